@@ -0,0 +1,116 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Import time regression check for Libdoc2TestBench.
+
+Runs importing the package, ``--version`` and ``--help`` with
+``python -X importtime`` and fails if Robot Framework or another of the
+deferred heavy modules is imported, or if importing the package takes
+longer than the given budget.
+
+Example: python benchmarks/check_import_time.py --budget-ms 100
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+COMMANDS = {
+    'import': ['-c', 'import Libdoc2TestBench'],
+    '--version': ['-m', 'Libdoc2TestBench', '--version'],
+    '--help': ['-m', 'Libdoc2TestBench', '--help'],
+}
+
+# Modules that must only be imported in the code paths that need them.
+DEFERRED_MODULES = [
+    'robot',
+    'Libdoc2TestBench.testbenchwriter',
+    'Libdoc2TestBench.xmlemitter',
+    'Libdoc2TestBench.htmldocs',
+    'Libdoc2TestBench.model',
+    'Libdoc2TestBench.specreader',
+    'Libdoc2TestBench.server',
+    'Libdoc2TestBench.shards',
+    'Libdoc2TestBench.baseline',
+    'Libdoc2TestBench.discovery',
+    'Libdoc2TestBench.dumpindex',
+    'Libdoc2TestBench.fingerprint',
+    'Libdoc2TestBench.pipeline',
+    'Libdoc2TestBench.watch',
+    'concurrent.futures',
+    'zipfile',
+    'cProfile',
+]
+
+
+def get_import_times(args) -> dict:
+    """Returns module name -> cumulative import time in microseconds."""
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC_DIR), os.environ.get('PYTHONPATH')])),
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:') :].split('|')
+        import_times[module.strip()] = int(cumulative)
+    return import_times
+
+
+def is_deferred(module: str) -> bool:
+    return any(module == name or module.startswith(name + '.') for name in DEFERRED_MODULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--budget-ms',
+        type=float,
+        default=150.0,
+        help='Maximum cumulative import time of the package in ms. default = 150',
+    )
+    options = parser.parse_args()
+
+    failures = []
+    for name, args in COMMANDS.items():
+        import_times = get_import_times(args)
+        deferred = sorted(module for module in import_times if is_deferred(module))
+        package_ms = import_times.get('Libdoc2TestBench', 0) / 1000
+        print(f"{name:<12}{package_ms:>8.1f} ms  {len(import_times)} modules")
+        if deferred:
+            failures.append(f"{name} imports deferred modules: {', '.join(deferred)}")
+        if package_ms > options.budget_ms:
+            failures.append(
+                f"{name} imports the package in {package_ms:.1f} ms, "
+                f"budget is {options.budget_ms:.1f} ms"
+            )
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Benchmark suite for Libdoc2TestBench.
+
+Generates synthetic Robot Framework libraries and a resource file of
+configurable size and measures wall time and peak memory (tracemalloc)
+of the single stages of a conversion:
+
+    create_libdoc, convert_docs_to_html, Libdoc2TestBenchWriter.write with
+    every emitter, write_zip_file, and load_libdocs and the writer with
+    every number of --jobs
+
+Every stage is timed without tracemalloc and run again to measure its peak
+memory, so tracing does not distort the times. Memory of worker processes
+is not traced. The results are written as JSON, so runs of different
+releases can be compared.
+
+Example: python benchmarks/run_benchmarks.py --keywords 2000 --jobs 1 4 --output bench.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from Libdoc2TestBench import EMITTERS, __version__, create_libdoc, load_libdocs, write_zip_file
+from Libdoc2TestBench.testbenchwriter import Libdoc2TestBenchWriter
+from robot.version import get_full_version as robot_version_print
+
+DOC_PARAGRAPH = (
+    "Keyword documentation with *bold*, _italic_ and ``code`` formatting, "
+    "a link to https://robotframework.org and a reference to `Keyword 1`.\n\n"
+)
+
+
+def generate_library(path: Path, keywords: int, args: int, enums: int, members: int, doc_size: int):
+    lines = ['from enum import Enum', '', '']
+    for enum_idx in range(enums):
+        lines.append(f'class Enum{enum_idx}(Enum):')
+        lines.append(f'    """{DOC_PARAGRAPH * doc_size}"""')
+        for member_idx in range(members):
+            lines.append(f'    MEMBER_{member_idx} = {member_idx}')
+        lines.extend(['', ''])
+    # The class has the name of the module, so it is the library.
+    lines.append(f'class {path.stem}:')
+    lines.append(f'    """{DOC_PARAGRAPH * doc_size}"""')
+    for keyword_idx in range(keywords):
+        params = ['self']
+        for arg_idx in range(args):
+            if enums and arg_idx == 0:
+                params.append(f'arg{arg_idx}: Enum{keyword_idx % enums}')
+            else:
+                params.append(f'arg{arg_idx}: str = "default"')
+        lines.append(f'    def keyword_{keyword_idx}({", ".join(params)}):')
+        lines.append(f'        """{DOC_PARAGRAPH * doc_size}"""')
+        lines.append('        pass')
+        lines.append('')
+    path.write_text('\n'.join(lines), encoding='UTF-8')
+
+
+def generate_resource(path: Path, keywords: int, args: int, doc_size: int):
+    lines = ['*** Keywords ***']
+    for keyword_idx in range(keywords):
+        lines.append(f'Resource Keyword {keyword_idx}')
+        lines.append(f'    [Documentation]    {DOC_PARAGRAPH.strip() * doc_size}')
+        arguments = '    '.join(f'${{arg{arg_idx}}}' for arg_idx in range(args))
+        if arguments:
+            lines.append(f'    [Arguments]    {arguments}')
+        lines.append('    No Operation')
+        lines.append('')
+    path.write_text('\n'.join(lines), encoding='UTF-8')
+
+
+def measure(results: dict, stage: str, func, *args, prepare=None):
+    """Times ``func(*args)`` and calls it again with tracemalloc to measure
+    its peak memory. ``prepare`` returns new arguments for the second call,
+    if the first one changed them. Returns the value of the timed call."""
+    start = time.perf_counter()
+    value = func(*args)
+    seconds = time.perf_counter() - start
+    if prepare:
+        args = prepare()
+    tracemalloc.start()
+    func(*args)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stage_results = results.setdefault(stage, {'seconds': 0.0, 'peak_memory_bytes': 0})
+    stage_results['seconds'] += seconds
+    stage_results['peak_memory_bytes'] = max(stage_results['peak_memory_bytes'], peak_memory)
+    return value
+
+
+def write_xml(libraries, resources, emitter='xmlwriter', convert_docs=False, jobs=1):
+    outfile = io.StringIO()
+    outfile.close = lambda: None  # Keep the buffer readable after write()
+    Libdoc2TestBenchWriter(emitter=emitter, convert_docs=convert_docs, jobs=jobs).write(
+        libraries, resources, outfile, None, 'RF', 'Resource', True
+    )
+    return len(outfile.getvalue().encode('UTF-8'))
+
+
+def convert_docs_to_html(libdoc):
+    libdoc.convert_docs_to_html()
+
+
+def run(options) -> dict:
+    stages = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        library_paths = [
+            temp_dir / f'SyntheticLibrary{index}.py' for index in range(options.libraries)
+        ]
+        resource_path = temp_dir / 'synthetic.resource'
+        for library_path in library_paths:
+            generate_library(
+                library_path,
+                options.keywords,
+                options.args,
+                options.enums,
+                options.members,
+                options.doc_size,
+            )
+        generate_resource(resource_path, options.keywords, options.args, options.doc_size)
+        paths = [str(path) for path in library_paths + [resource_path]]
+
+        libdocs = []
+        for path in paths:
+            libdoc = measure(stages, 'create_libdoc', create_libdoc, path, None, None, None, 'RAW')
+            measure(
+                stages,
+                'convert_docs_to_html',
+                convert_docs_to_html,
+                libdoc,
+                prepare=lambda: (create_libdoc(path, None, None, None, 'RAW'),),
+            )
+            libdocs.append(libdoc)
+        libraries, resources = libdocs[:-1], libdocs[-1:]
+
+        for emitter in EMITTERS:
+            xml_bytes = measure(
+                stages, f'write[{emitter}]', write_xml, libraries, resources, emitter
+            )
+        zip_path = temp_dir / 'project-dump.zip'
+        measure(
+            stages,
+            'write_zip_file',
+            write_zip_file,
+            str(zip_path),
+            libraries,
+            resources,
+            None,
+            'RF',
+            'Resource',
+            True,
+        )
+        zip_bytes = zip_path.stat().st_size
+
+        for jobs in options.jobs:
+            raw_libdocs = measure(
+                stages,
+                f'load_libdocs[jobs={jobs}]',
+                load_libdocs,
+                paths,
+                None,
+                None,
+                None,
+                'RAW',
+                jobs,
+            )
+            # The writer converts the docs of the raw libdocs while it renders them.
+            measure(
+                stages,
+                f'write[render_jobs={jobs}]',
+                write_xml,
+                raw_libdocs[:-1],
+                raw_libdocs[-1:],
+                'xmlwriter',
+                True,
+                jobs,
+            )
+
+    return {
+        'libdoc2testbench': __version__,
+        'robotframework': robot_version_print(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'libraries': options.libraries,
+            'keywords': options.keywords,
+            'args': options.args,
+            'enums': options.enums,
+            'members': options.members,
+            'doc_size': options.doc_size,
+            'jobs': options.jobs,
+        },
+        'output': {'xml_bytes': xml_bytes, 'zip_bytes': zip_bytes},
+        'stages': stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--libraries', type=int, default=1, help='Number of libraries.')
+    parser.add_argument('--keywords', type=int, default=500, help='Keywords per library.')
+    parser.add_argument('--args', type=int, default=4, help='Arguments per keyword.')
+    parser.add_argument('--enums', type=int, default=20, help='Enums in the library.')
+    parser.add_argument('--members', type=int, default=50, help='Members per enum.')
+    parser.add_argument(
+        '--doc-size', type=int, default=5, help='Paragraphs per documentation string.'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        nargs='+',
+        default=[1],
+        help='Numbers of load and render jobs to benchmark, e.g. --jobs 1 4.',
+    )
+    parser.add_argument('--output', help='Path of the JSON result file, default = stdout.')
+    options = parser.parse_args()
+
+    results = json.dumps(run(options), indent=2)
+    if options.output:
+        Path(options.output).write_text(results, encoding='UTF-8')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,23 +12,40 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import io
 import os
 import re
 import sys
+import time
 import argparse
-import shutil
+from functools import partial
 from pathlib import Path
-from zipfile import ZipFile
 
-from .testbenchwriter import Libdoc2TestBenchWriter
-from robot.libdocpkg import LibraryDocumentation
-from robot.version import get_full_version as robot_version_print
+# Robot Framework and the modules depending on it are imported where they are
+# used, so that --help, --version and importing this package stay fast.
+# benchmarks/check_import_time.py verifies this.
+from .batch import read_manifest
+from .libdoccache import DEFAULT_CACHE_SIZE, LibdocCache
+from .stats import RunStats, run_profiled
 
 __version__ = "1.0"
 
+EMITTERS = ['xmlwriter', 'template']
+COMPRESSIONS = ['stored', 'deflated', 'bzip2', 'lzma']
+
 
 def start_libdoc2testbench():
     """ Command line entry point for the Libdoc2TestBench module."""
+    if sys.argv[1:2] == ['serve']:
+        from .server import start_server
+
+        start_server(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['inspect']:
+        from .dumpindex import start_inspect
+
+        start_inspect(sys.argv[2:])
+        return
     parser = argparse.ArgumentParser(
         description="""Robot Framework Libdoc Extension that generates imbus
                     TestBench Library import formats. The easiest way to run
@@ -38,10 +55,15 @@ def start_libdoc2testbench():
                     """,
         usage=f"Libdoc2TestBench <LIBRARY> <output.zip>",
         prog='Libdoc2TestBench',
-        epilog='Example: Libdoc2TestBench Browser My-Browser-Dump.zip',
+        epilog='Example: Libdoc2TestBench Browser My-Browser-Dump.zip | '
+        'Server mode: Libdoc2TestBench serve --help | '
+        'Index of project dumps: Libdoc2TestBench inspect --help',
     )
     parser.add_argument(
-        "library_or_resource", help="RF library or resource", nargs='?', default=None
+        "library_or_resource",
+        help="RF library or resource, import list, directory or glob pattern of resources",
+        nargs='?',
+        default=None,
     )
     parser.add_argument(
         'outfile_path',
@@ -55,15 +77,83 @@ def start_libdoc2testbench():
         action='store_true',
         help='Defines if a resource file will be attached to all interactions.',
     )
+    parser.add_argument(
+        '-b',
+        '--baseline',
+        help='Previous project dump (zip or xml). Only new or changed interactions and data types are written.',
+    )
+    parser.add_argument(
+        '--batch',
+        help='JSON manifest with several outputs. Every library is loaded once and shared by all outputs, which are written concurrently.',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory used to cache converted libdocs between runs.',
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f'Size limit of the libdoc cache in MB. default = {DEFAULT_CACHE_SIZE}',
+    )
+    parser.add_argument(
+        '--compression',
+        choices=COMPRESSIONS,
+        default='stored',
+        help='Compression of the entries of the zip-file. default = stored',
+    )
+    parser.add_argument(
+        '--compresslevel',
+        type=int,
+        choices=range(0, 10),
+        metavar='{0-9}',
+        help='Compression level, 0-9 for deflated and 1-9 for bzip2. Ignored for stored and lzma.',
+    )
+    parser.add_argument(
+        '--emitter',
+        choices=EMITTERS,
+        default='xmlwriter',
+        help='XML emitter backend. `template` renders interactions from precompiled templates with buffered writes and produces identical output. default = xmlwriter',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Writes the zip-file even if it was written from the same inputs before.',
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        metavar='PATTERN',
+        help='Leaves out the files of scanned directories and glob patterns that match PATTERN. PATTERN is matched against the file name and the path relative to the scanned directory or to the part of the glob pattern without wildcards. Can be given several times.',
+    )
     parser.add_argument(
         '-F',
         '--docformat',
         choices=['ROBOT', 'HTML', 'TEXT', 'REST'],
         help="Specifies the source documentation format. Possible values are Robot Framework's documentation format, HTML, plain text, and reStructuredText. The default value can be specified in library source code and the initial default value is `ROBOT`.",
     )
+    parser.add_argument(
+        '--include',
+        action='append',
+        metavar='PATTERN',
+        help='Scans directories for the files that match PATTERN instead of *.resource. PATTERN is matched like with --exclude. Can be given several times.',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of processes used to load the entries of an import list, directory or glob pattern. default = 1',
+    )
     parser.add_argument(
         '--libraryroot', help='Defines which subdivision name contains libraries.', default='RF'
     )
+    parser.add_argument(
+        '--max-elements',
+        type=int,
+        metavar='N',
+        help='Writes several project dumps (shards) of whole libraries and resources with at most N interactions and data types each. Implies --shard-by library.',
+    )
     parser.add_argument(
         '--libversion',
         help="Sets the version of the documented library or resource written in the description.",
@@ -72,6 +162,12 @@ def start_libdoc2testbench():
     parser.add_argument(
         '-r', '--repository', help='Sets the repository id of the TestBench import. default = itba'
     )
+    parser.add_argument(
+        '--render-jobs',
+        type=int,
+        default=1,
+        help='Number of processes used to render the subdivisions of the libraries and resources. The output does not depend on it. default = 1',
+    )
     parser.add_argument(
         '--resourceroot',
         help='Defines which subdivision name contains resources.',
@@ -84,7 +180,43 @@ def start_libdoc2testbench():
         choices=['HTML', 'RAW'],
         help="Specifies the documentation format used with XML and JSON spec files. `raw` means preserving the original documentation format and `html` means converting documentation to HTML. The default is `html`.",
     )
-    parser.add_argument('-t', '--temp', help='Path to write the temporary files to.')
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        help='Runs the conversion with cProfile and writes the statistics to the given file or prints them if no file is given.',
+    )
+    parser.add_argument(
+        '--shard-by',
+        choices=['library'],
+        help='Writes one project dump (shard) per library or resource with disjoint primary keys and a JSON manifest of the shards. Parameters whose data type is in another shard get the generic data type. With --baseline, every shard is compared to the baseline elements of its own libraries.',
+    )
+    parser.add_argument(
+        '--shared-datatypes',
+        action='store_true',
+        help='Writes identical enums of several libraries once to a shared _Datatypes subdivision.',
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Prints wall time per phase and library, written bytes, emitted elements and the peak memory of the run.',
+    )
+    parser.add_argument(
+        '--stats-json', help='Writes the statistics of --stats as JSON to the given file.'
+    )
+    parser.add_argument(
+        '-t',
+        '--temp',
+        help='Deprecated and ignored: the project dump is written without temporary files.',
+    )
+    parser.add_argument(
+        '--watch',
+        nargs='?',
+        type=float,
+        const=1.0,
+        metavar='SECONDS',
+        help='Writes the project dump again whenever the import list or a source of its libraries or resources changes. Sources are checked every SECONDS, default = 1',
+    )
     parser.add_argument(
         '-x', '--xml', action='store_true', help='Writes a single xml-file instead of the zipfile.'
     )
@@ -95,6 +227,21 @@ def start_libdoc2testbench():
         help='Writes the Libdoc2TestBench, Robot Framework and Python version to console.',
     )
     args = parser.parse_args()
+    if args.compression == 'bzip2' and args.compresslevel == 0:
+        parser.error('argument --compresslevel: bzip2 requires a level from 1 to 9')
+    if args.watch is not None and args.batch:
+        parser.error('argument --watch: not allowed with argument --batch')
+    if args.watch is not None and args.watch <= 0:
+        parser.error('argument --watch: SECONDS must be greater than 0')
+    if args.jobs <= 0:
+        parser.error('argument --jobs: must be greater than 0')
+    if args.render_jobs <= 0:
+        parser.error('argument --render-jobs: must be greater than 0')
+    if args.max_elements is not None and args.max_elements <= 0:
+        parser.error('argument --max-elements: N must be greater than 0')
+    shard_by = args.shard_by or ('library' if args.max_elements else None)
+    if shard_by and (args.batch or args.watch is not None):
+        parser.error('argument --shard-by: not allowed with argument --batch or --watch')
 
     lib = args.library_or_resource
     outfile_path = args.outfile_path
@@ -109,18 +256,55 @@ def start_libdoc2testbench():
     library_root = args.libraryroot
     resource_root = args.resourceroot
     attachment = args.attachment
+    jobs = args.jobs
+    baseline_path = args.baseline
+    emitter = args.emitter
+    stats = RunStats() if args.stats or args.stats_json else None
 
     if info_flag:
         robot_version = robot_version_print()
         print(f'Libdoc2TestBench {__version__} [Robot Framework {robot_version}]')
         sys.exit()
 
-    if not lib:
+    # Creates the cache directory, so it is not done for --version.
+    cache = LibdocCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+
+    if args.batch:
+        batch_args = (args.batch, vars(args), jobs, cache, stats)
+        if args.profile:
+            run_profiled(args.profile, create_batch_dumps, *batch_args)
+        else:
+            create_batch_dumps(*batch_args)
+    elif not lib:
         sys.exit(
             'Libdoc2TestBench: error: the following arguments are required: library_or_resource'
         )
+    elif args.watch:
+        from .watch import watch_project_dump
+
+        watch_project_dump(
+            lib,
+            outfile_path,
+            specdocformat,
+            docformat,
+            lib_name,
+            lib_version,
+            repo_id,
+            xml_flag,
+            library_root,
+            resource_root,
+            attachment,
+            baseline_path,
+            emitter,
+            args.compression,
+            args.compresslevel,
+            args.shared_datatypes,
+            args.watch,
+            args.include,
+            args.exclude,
+        )
     else:
-        create_project_dump(
+        project_dump_args = (
             lib,
             outfile_path,
             specdocformat,
@@ -133,7 +317,47 @@ def start_libdoc2testbench():
             library_root,
             resource_root,
             attachment,
+            jobs,
+            cache,
+            baseline_path,
+            emitter,
+            stats,
+            args.compression,
+            args.compresslevel,
+            args.shared_datatypes,
+            args.force,
+            shard_by,
+            args.max_elements,
+            args.render_jobs,
+            args.include,
+            args.exclude,
         )
+        if args.profile:
+            run_profiled(args.profile, create_project_dump, *project_dump_args)
+        else:
+            create_project_dump(*project_dump_args)
+    if args.stats:
+        stats.print_table()
+    if args.stats_json:
+        stats.write_json(args.stats_json)
+
+
+def robot_version_print() -> str:
+    """Returns the full Robot Framework version like robot.version.get_full_version.
+
+    robot/version.py is run on its own, because importing any module of the
+    robot package imports most of Robot Framework."""
+    import importlib.util
+    import runpy
+
+    spec = importlib.util.find_spec('robot')
+    if spec and spec.submodule_search_locations:
+        version_file = os.path.join(spec.submodule_search_locations[0], 'version.py')
+        if os.path.isfile(version_file):
+            return runpy.run_path(version_file)['get_full_version']()
+    from robot.version import get_full_version
+
+    return get_full_version()
 
 
 def create_project_dump(
@@ -149,37 +373,361 @@ def create_project_dump(
     library_root,
     resource_root,
     attachment: bool,
+    jobs: int = 1,
+    cache: LibdocCache = None,
+    baseline_path: str = None,
+    emitter: str = 'xmlwriter',
+    stats: RunStats = None,
+    compression: str = 'stored',
+    compresslevel: int = None,
+    shared_datatypes: bool = False,
+    force: bool = False,
+    shard_by: str = None,
+    max_elements: int = None,
+    render_jobs: int = 1,
+    include: list = None,
+    exclude: list = None,
 ):
-    # Init attachments_path, for handling a resource
-    attachments_path = None
+    # Docs are converted lazily by the writer, so the libdocs are loaded raw.
+    convert_docs = specdocformat == 'HTML'
+    names = {}
+    entries = get_entries(lib_or_res, include, exclude, names)
+    baseline = load_baseline(baseline_path) if baseline_path else None
 
-    # Holds the last generated primary key by the testbenchwriter.
-    # This is used as part of the exit message on successful conversion.
-    last_issued_pk = None
+    fingerprint = None
+    # Without an output path, the output is named after the loaded library.
+    # Shards are always written.
+    if not xml_flag and not shard_by and (outfile_path or len(entries) > 1):
+        from .fingerprint import input_fingerprint, is_up_to_date
 
-    libraries, resources = get_libdoc_lists(lib_or_res, lib_name, lib_version,
-                                            docformat, specdocformat)
+        options = {
+            'repository': repo_id,
+            'libraryroot': library_root,
+            'resourceroot': resource_root,
+            'attachment': attachment,
+            'specdocformat': specdocformat,
+            'docformat': docformat,
+            'name': lib_name,
+            'libversion': lib_version,
+            'xml': xml_flag,
+            'emitter': emitter,
+            'baseline': baseline_path,
+            'compression': compression,
+            'compresslevel': compresslevel,
+            'shareddatatypes': shared_datatypes,
+            'include': include,
+            'exclude': exclude,
+        }
+        fingerprint = input_fingerprint([lib_or_res], options)
+        known_outfile_path = get_outfile_path(outfile_path, entries, xml_flag)
+        if not force and is_up_to_date(known_outfile_path, fingerprint):
+            print_up_to_date(known_outfile_path)
+            return
+    doc_converter = None
+    if cache and convert_docs:
+        from .htmldocs import HtmlDocConverter
 
-    # If set, create necessary subdirectories
-    if temp_path:
-        temp_path = Path(temp_path)
-        temp_path.mkdir(parents=True, exist_ok=True)
-    # else just use the current directory
+        # Starts with the HTML docs the cache kept, see _store_cached_docs.
+        doc_converter = HtmlDocConverter()
+    # A delta export compares all libdocs to the baseline before writing.
+    if len(entries) > 1 and not baseline_path:
+        libraries, resources = stream_libdoc_lists(
+            entries,
+            lib_name,
+            lib_version,
+            docformat,
+            'RAW',
+            jobs,
+            cache,
+            stats,
+            names,
+            doc_converter,
+        )
+        # Several entries are written to the default project-dump file.
+        libdocs = []
     else:
-        temp_path = Path.cwd()
+        from .model import build_libraries
 
-    project_dump_path = temp_path.joinpath('project-dump.xml')
+        libraries, resources = get_libdoc_lists(
+            lib_or_res, lib_name, lib_version, docformat, 'RAW', jobs, cache, stats, entries, names
+        )
+        # The libdocs are released, all outputs are written from their models.
+        libraries, resources = build_libraries(libraries), build_libraries(resources)
+        libdocs = libraries + resources
+        if doc_converter:
+            for libdoc in libdocs:
+                doc_converter.update_memo(cache.load_docs(libdoc))
 
-    # Check for already existing project-dump.xml
-    if project_dump_path.is_file():
-        user_input = input('project-dump.xml already exists... overwrite? y/n? \n')
-        if user_input.lower() not in ['y', 'yes']:
-            sys.exit('Stopped execution - file was not changed.')
+    outfile_path = get_outfile_path(outfile_path, libdocs, xml_flag)
+    if not shard_by:
+        confirm_overwrite(outfile_path)
+
+    writer_args = (
+        repo_id,
+        library_root,
+        resource_root,
+        attachment,
+        baseline,
+        emitter,
+        stats,
+        convert_docs,
+        doc_converter,
+        shared_datatypes,
+        render_jobs,
+    )
+    if shard_by:
+        from .shards import write_shards
+
+        outfile_paths = write_shards(
+            outfile_path,
+            libraries,
+            resources,
+            xml_flag,
+            writer_args,
+            compression,
+            compresslevel,
+            max_elements,
+        )
+    else:
+        write_output(
+            outfile_path,
+            libraries,
+            resources,
+            xml_flag,
+            writer_args,
+            compression,
+            compresslevel,
+            fingerprint,
+        )
+        outfile_paths = [outfile_path]
+    if doc_converter:
+        _store_cached_docs(cache, doc_converter, list(libraries) + list(resources), stats)
+    if stats:
+        for path in outfile_paths:
+            for output, size in get_output_sizes(path, xml_flag).items():
+                stats.bytes_written[output] = stats.bytes_written.get(output, 0) + size
+
+
+def create_batch_dumps(
+    manifest_path: str,
+    defaults: dict,
+    jobs: int = 1,
+    cache: LibdocCache = None,
+    stats: RunStats = None,
+):
+    """Writes all outputs of a batch manifest.
+
+    Every library or resource is loaded once and shared by all outputs that
+    use it. Docs are converted by one HtmlDocConverter, so each doc is only
+    converted once, and the outputs are written concurrently."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .batch import OUTPUT_OPTIONS
+    from .fingerprint import input_fingerprint, is_up_to_date
+    from .htmldocs import HtmlDocConverter
+    from .model import build_library
+
+    try:
+        outputs = read_manifest(manifest_path, defaults)
+    except (OSError, ValueError) as error:
+        sys.exit(str(error))
+    for output in outputs:
+        output['fingerprint'] = None
+        if not output['xml']:
+            output['fingerprint'] = input_fingerprint(
+                output['libraries'], {key: output[key] for key in OUTPUT_OPTIONS}
+            )
+    if not defaults.get('force'):
+        outdated = []
+        for output in outputs:
+            outfile_path = get_outfile_path(output['output'], [], output['xml'])
+            if is_up_to_date(outfile_path, output['fingerprint']):
+                print_up_to_date(outfile_path)
+            else:
+                outdated.append(output)
+        outputs = outdated
+        if not outputs:
+            return
+
+    # (entry, name, libversion, docformat) -> libdoc, loaded once per run.
+    libdocs = {}
+    for output in outputs:
+        output['baseline'] = load_baseline(output['baseline']) if output['baseline'] else None
+        output['entries'] = []
+        for library in output['libraries']:
+            names = {}
+            entries = get_entries(library, output['include'], output['exclude'], names)
+            for entry in entries or [library]:
+                name = names.get(entry, output['name'])
+                key = (entry, name, output['libversion'], output['docformat'])
+                libdocs[key] = None
+                output['entries'].append(key)
+    doc_converter = HtmlDocConverter()
+    load_groups = {}
+    for key in libdocs:
+        load_groups.setdefault(key[1:], []).append(key[0])
+    for (lib_name, lib_version, docformat), entries in load_groups.items():
+        loaded = load_libdocs(entries, lib_name, lib_version, docformat, 'RAW', jobs, cache, stats)
+        for entry, libdoc in zip(entries, loaded):
+            print_stat(libdoc)
+            # Outputs share the compact model, the libdoc itself is released.
+            model = libdocs[(entry, lib_name, lib_version, docformat)] = build_library(libdoc)
+            if cache:
+                doc_converter.update_memo(cache.load_docs(model))
 
+    jobs_args = []
+    for output in outputs:
+        libraries, resources = [], []
+        for key in dict.fromkeys(output['entries']):
+            libdoc = libdocs[key]
+            (resources if libdoc.type == 'RESOURCE' else libraries).append(libdoc)
+        outfile_path = get_outfile_path(output['output'], libraries + resources, output['xml'])
+        confirm_overwrite(outfile_path)
+        writer_args = (
+            output['repository'],
+            output['libraryroot'],
+            output['resourceroot'],
+            output['attachment'],
+            output['baseline'],
+            output['emitter'],
+            # Every output counts its own elements, phases are timed for all outputs.
+            RunStats() if stats else None,
+            output['specdocformat'] == 'HTML',
+            doc_converter,
+            output['shareddatatypes'],
+        )
+        jobs_args.append(
+            (
+                outfile_path,
+                libraries,
+                resources,
+                output['xml'],
+                writer_args,
+                output['compression'],
+                output['compresslevel'],
+                output['fingerprint'],
+            )
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(jobs_args), os.cpu_count() or 1)) as executor:
+        # list() re-raises the first exception of a failed output.
+        list(executor.map(lambda job_args: write_output(*job_args), jobs_args))
+    if stats:
+        seconds = time.perf_counter() - start
+        for name, convert_seconds in doc_converter.timings.items():
+            stats.add_library(name, {'convert': convert_seconds})
+            stats.add_phase('convert', convert_seconds)
+            seconds -= convert_seconds
+        stats.add_phase('write', seconds)
+        for outfile_path, _, _, xml_flag, writer_args, _, _, _ in jobs_args:
+            stats.add_elements(writer_args[6].elements)
+            for output, size in get_output_sizes(outfile_path, xml_flag).items():
+                stats.bytes_written[output] = stats.bytes_written.get(output, 0) + size
+    if cache:
+        for libdoc in libdocs.values():
+            cache.store_docs(libdoc, doc_converter.get_library_docs(libdoc))
+
+
+def write_dump(
+    libdocs,
+    outfile,
+    xml: bool = False,
+    repository: str = None,
+    library_root: str = 'RF',
+    resource_root: str = 'Resource',
+    attachment: bool = False,
+    specdocformat: str = 'HTML',
+    docformat: str = None,
+    name: str = None,
+    libversion: str = None,
+    emitter: str = 'xmlwriter',
+    compression: str = 'stored',
+    compresslevel: int = None,
+    shared_datatypes: bool = False,
+    baseline: str = None,
+    include: list = None,
+    exclude: list = None,
+    doc_converter=None,
+):
+    """Writes a project dump to the binary file-like object ``outfile``.
+
+    ``libdocs`` are loaded libdocs with docs in their original format and
+    names or paths of libraries, resources, spec files, import lists,
+    directories and glob patterns, which are loaded. ``outfile`` is e.g. an
+    io.BytesIO, a socket file or an HTTP response and is not closed. The zip
+    file is written, or the XML file if ``xml`` is set. The other options
+    correspond to the command line arguments, ``baseline`` is the path of a
+    previous project dump. A ``doc_converter`` (htmldocs.HtmlDocConverter)
+    given to several calls converts every doc only once.
+
+    No temporary files are used and nothing is asked. Libraries that cannot
+    be loaded and an unreadable baseline raise a ValueError."""
+    if baseline:
+        from .baseline import read_baseline
+
+        baseline = read_baseline(baseline)
+    libraries, resources = [], []
+    for libdoc in libdocs:
+        if isinstance(libdoc, str):
+            try:
+                names = {}
+                loaded = [
+                    create_libdoc(entry, names.get(entry, name), libversion, docformat, 'RAW')
+                    for entry in get_entries(libdoc, include, exclude, names) or [libdoc]
+                ]
+            except SystemExit as error:
+                raise ValueError(str(error)) from None
+        else:
+            loaded = [libdoc]
+        for libdoc in loaded:
+            (resources if libdoc.type == 'RESOURCE' else libraries).append(libdoc)
+    if not (libraries or resources):
+        raise ValueError('No libraries given.')
+    writer_args = (
+        repository,
+        library_root,
+        resource_root,
+        attachment,
+        baseline,
+        emitter,
+        None,
+        specdocformat == 'HTML',
+        doc_converter,
+        shared_datatypes,
+    )
+    if xml:
+        # The XML writer closes its output, but not the outfile below it.
+        xml_file = io.TextIOWrapper(io.BufferedWriter(_NonClosingWriter(outfile)), encoding='UTF-8')
+        write_project_dump(xml_file, libraries, resources, *writer_args)
+    else:
+        write_zip_file(
+            outfile,
+            libraries,
+            resources,
+            *writer_args,
+            compression=compression,
+            compresslevel=compresslevel,
+        )
+
+
+class _NonClosingWriter(io.RawIOBase):
+    def __init__(self, outfile):
+        self._outfile = outfile
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._outfile.write(data)
+        return len(data)
+
+
+def get_outfile_path(outfile_path: str, libdocs: list, xml_flag: bool) -> str:
+    """Returns the output path with the extension of the output format."""
     if not outfile_path:
-        lib_lists = libraries + resources
-        if len(lib_lists) == 1:
-            outfile_path = lib_lists[0].name
+        if len(libdocs) == 1:
+            outfile_path = libdocs[0].name
         else:
             outfile_path = 'project-dump'
 
@@ -195,62 +743,131 @@ def create_project_dump(
             if os.path.splitext(outfile_path)[1].lower() == '.zip'
             else f"{outfile_path}.zip"
         )
+    return outfile_path
 
-    with open(project_dump_path, "w", encoding='UTF-8') as outfile:
 
-        # The write method returns the last issued primary key.
-        Libdoc2TestBenchWriter().write(
-            libraries,
-            resources,
-            outfile,
-            repo_id,
-            library_root,
-            resource_root,
-            attachment,
-        )
+def confirm_overwrite(outfile_path: str):
+    # If a file exists at the output path - get permission to overwrite.
+    if Path(outfile_path).is_file():
+        user_input = input(f'{outfile_path} already exists... overwrite? y/n? \n')
+        if user_input.lower() not in ['y', 'yes']:
+            sys.exit('Stopped execution - file was not changed.')
 
-        # If a file exists at the output path - get permission to overwrite.
-        if Path(outfile_path).is_file():
-            user_input = input(f'{outfile_path} already exists... overwrite? y/n? \n')
-            if user_input.lower() not in ['y', 'yes']:
-                sys.exit('Stopped execution - file was not changed.')
-            os.remove(outfile_path)
 
+def write_output(
+    outfile_path,
+    libraries,
+    resources,
+    xml_flag,
+    writer_args,
+    compression='stored',
+    compresslevel=None,
+    fingerprint=None,
+    first_pk=230,
+):
+    """Writes the project dump to ``outfile_path`` and returns the last issued
+    primary key."""
+    try:
         if xml_flag:
-            # Put XML-file in output_path and leave attachments behind
-            os.rename(project_dump_path, outfile_path)
+            # Write the XML-file to output_path and leave attachments behind
+            with open(outfile_path, "w", encoding='UTF-8') as outfile:
+                last_issued_pk = write_project_dump(
+                    outfile, libraries, resources, *writer_args, first_pk=first_pk
+                )
         else:
-            # Build the zip file and clean up.
-            write_zip_file(outfile_path, project_dump_path, resources, attachment)
-            os.remove(project_dump_path)
-            if attachments_path:
-                shutil.rmtree(attachments_path)
+            # The XML is streamed directly into the zip file.
+            last_issued_pk = write_zip_file(
+                outfile_path,
+                libraries,
+                resources,
+                *writer_args,
+                compression=compression,
+                compresslevel=compresslevel,
+                fingerprint=fingerprint,
+                first_pk=first_pk,
+            )
+    except BaseException as error:
+        # Streamed libdocs may fail to load while writing, e.g. with sys.exit.
+        if os.path.exists(outfile_path):
+            os.remove(outfile_path)
+        if isinstance(error, ValueError):
+            # E.g. libraries or resources with the same name.
+            sys.exit(str(error))
+        raise
 
     absolute_outfile_path = Path(outfile_path).resolve()
+    print(f"Successfully written TestBench project dump to: \n{absolute_outfile_path}")
+    return last_issued_pk
+
+
+def _store_cached_docs(cache, doc_converter, libdocs, stats=None):
+    # The next run with this cache does not convert the docs again.
+    for libdoc in libdocs:
+        cache.store_docs(libdoc, doc_converter.get_library_docs(libdoc))
+    if stats:
+        # The timings of a shared converter are collected by its owner, they
+        # were counted as part of the write phase.
+        for name, convert_seconds in doc_converter.timings.items():
+            stats.add_library(name, {'convert': convert_seconds})
+            stats.add_phase('convert', convert_seconds)
+            stats.add_phase('write', -convert_seconds)
+
+
+def print_up_to_date(outfile_path):
     print(
-        f"Successfully written TestBench project dump to: \n{absolute_outfile_path}"
+        f"{Path(outfile_path).resolve()} is up to date, its inputs did not change. "
+        "Use --force to write it anyway."
     )
 
 
-def get_libdoc_lists(lib_or_res, lib_name, lib_version, docformat, specdocformat):
+def get_attachment_name(libdoc) -> str:
+    """Returns the zip entry of the attached source of a resource. It is named
+    after the resource, which is unique in a dump unlike the file name."""
+    return f"attachments/{libdoc.name}{os.path.splitext(libdoc.source)[1]}"
+
+
+def get_output_sizes(outfile_path, xml_flag) -> dict:
+    from zipfile import ZipFile
+
+    if xml_flag:
+        return {'xml': os.path.getsize(outfile_path)}
+    with ZipFile(outfile_path) as zip_file:
+        xml_size = zip_file.getinfo('project-dump.xml').file_size
+    return {'xml': xml_size, 'zip': os.path.getsize(outfile_path)}
+
+
+def get_libdoc_lists(
+    lib_or_res,
+    lib_name,
+    lib_version,
+    docformat,
+    specdocformat,
+    jobs=1,
+    cache=None,
+    stats=None,
+    entries=None,
+    names=None,
+):
     resources = []
     libraries = []
-    if os.path.exists(lib_or_res):
-        with open(lib_or_res, "r", encoding='UTF-8') as library_list:
-            first_line = library_list.readline()
-            if re.fullmatch(r'\*+\s*import\s?list(\s?\**)\n?', first_line, re.IGNORECASE):
-                for line in library_list.read().splitlines():
-                    if not line.strip().startswith('#') and not len(line.strip()) == 0:
-                        libdoc = create_libdoc(
-                            line.strip(), lib_name, lib_version, docformat, specdocformat
-                        )
-                        if libdoc.type == 'RESOURCE':
-                            resources.append(libdoc)
-                        else:
-                            libraries.append(libdoc)
-                        print_stat(libdoc)
+    if entries is None:
+        entries = read_import_list(lib_or_res)
+    if entries:
+        for libdoc in load_libdocs(
+            entries, lib_name, lib_version, docformat, specdocformat, jobs, cache, stats, names
+        ):
+            if libdoc.type == 'RESOURCE':
+                resources.append(libdoc)
+            else:
+                libraries.append(libdoc)
+            print_stat(libdoc)
     if not (libraries or resources):
-        libdoc = create_libdoc(lib_or_res, lib_name, lib_version, docformat, specdocformat)
+        timings = {}
+        libdoc = create_libdoc(
+            lib_or_res, lib_name, lib_version, docformat, specdocformat, cache, timings
+        )
+        if stats:
+            _add_library_stats(stats, libdoc, timings)
         print_stat(libdoc)
         if libdoc.type == 'RESOURCE':
             resources.append(libdoc)
@@ -259,6 +876,159 @@ def get_libdoc_lists(lib_or_res, lib_name, lib_version, docformat, specdocformat
     return libraries, resources
 
 
+def stream_libdoc_lists(
+    entries,
+    lib_name,
+    lib_version,
+    docformat,
+    specdocformat,
+    jobs=1,
+    cache=None,
+    stats=None,
+    names=None,
+    doc_converter=None,
+):
+    """Returns the libraries and resources of the import list entries as
+    LibdocStreams, which load the libdocs one at a time while they are written.
+    ``names`` are the entry -> name of get_entries. A ``doc_converter`` gets
+    the HTML docs the cache kept for every loaded libdoc."""
+    from .pipeline import LibdocStream, split_entries
+
+    load = partial(
+        _create_timed_libdoc,
+        lib_name=lib_name,
+        lib_version=lib_version,
+        docformat=docformat,
+        specdocformat=specdocformat,
+        cache=cache,
+        names=names,
+    )
+
+    def on_load(libdoc, timings):
+        if stats:
+            _add_library_stats(stats, libdoc, timings)
+        if doc_converter:
+            doc_converter.update_memo(cache.load_docs(libdoc))
+        print_stat(libdoc)
+
+    library_entries, resource_entries, loaded = split_entries(entries, load)
+    return (
+        LibdocStream(library_entries, load, jobs, on_load, loaded),
+        LibdocStream(resource_entries, load, jobs, on_load, loaded),
+    )
+
+
+def read_import_list(lib_or_res):
+    """Returns the entries of an ``*** Import List ***`` file or an empty list
+    if ``lib_or_res`` is not such a file."""
+    entries = []
+    if os.path.isfile(lib_or_res):
+        with open(lib_or_res, "r", encoding='UTF-8') as library_list:
+            first_line = library_list.readline()
+            if re.fullmatch(r'\*+\s*import\s?list(\s?\**)\n?', first_line, re.IGNORECASE):
+                for line in library_list.read().splitlines():
+                    if not line.strip().startswith('#') and not len(line.strip()) == 0:
+                        entries.append(line.strip())
+    return entries
+
+
+def get_entries(lib_or_res, include=None, exclude=None, names=None):
+    """Returns the entries of an import list, directory or glob pattern or an
+    empty list if ``lib_or_res`` is a single library or resource.
+
+    Directories and glob patterns, also those in an import list, are replaced
+    by the files they contain, see discovery.expand_entries. If given,
+    ``names`` is filled with entry -> name of the files in subdirectories.
+    Exits before anything is loaded if two entries would get the same name."""
+    from .discovery import check_unique_names, expand_entries, is_expandable
+
+    names = {} if names is None else names
+    entries = read_import_list(lib_or_res)
+    if not entries and not is_expandable(lib_or_res):
+        return []
+    entries = expand_entries(entries or [lib_or_res], include, exclude, names=names)
+    if not entries:
+        sys.exit(f"No libraries or resources found in '{lib_or_res}'.")
+    try:
+        check_unique_names(entries, names)
+    except ValueError as error:
+        sys.exit(str(error))
+    return entries
+
+
+def load_baseline(baseline_path):
+    """Returns the elements of the baseline project dump or exits if it cannot
+    be read, before anything is loaded."""
+    from .baseline import read_baseline
+
+    try:
+        return read_baseline(baseline_path)
+    except ValueError as error:
+        sys.exit(str(error))
+
+
+def load_libdocs(
+    entries,
+    lib_name,
+    lib_version,
+    docformat,
+    specdocformat,
+    jobs=1,
+    cache=None,
+    stats=None,
+    names=None,
+):
+    """Creates the libdocs for all entries, keeping the order of the entries.
+    ``names`` are the entry -> name of get_entries.
+
+    With ``jobs`` greater than one the libraries are imported and converted
+    in a process pool."""
+    load = partial(
+        _create_timed_libdoc,
+        lib_name=lib_name,
+        lib_version=lib_version,
+        docformat=docformat,
+        specdocformat=specdocformat,
+        cache=cache,
+        names=names,
+    )
+    if jobs <= 1 or len(entries) <= 1:
+        results = [load(entry) for entry in entries]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .pipeline import from_portable, load_portable
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(entries))) as executor:
+            portable_load = partial(load_portable, load)
+            results = [
+                (from_portable(libdoc), timings)
+                for libdoc, timings in executor.map(portable_load, entries)
+            ]
+    if stats:
+        for libdoc, timings in results:
+            _add_library_stats(stats, libdoc, timings)
+    return [libdoc for libdoc, _ in results]
+
+
+def _create_timed_libdoc(
+    lib_or_res, lib_name, lib_version, docformat, specdocformat, cache, names=None
+):
+    timings = {}
+    # Files in subdirectories of a scanned directory are named after their path.
+    lib_name = (names or {}).get(lib_or_res, lib_name)
+    libdoc = create_libdoc(
+        lib_or_res, lib_name, lib_version, docformat, specdocformat, cache, timings
+    )
+    return libdoc, timings
+
+
+def _add_library_stats(stats, libdoc, timings):
+    stats.add_library(libdoc.name, timings)
+    for phase, seconds in timings.items():
+        stats.add_phase(phase, seconds)
+
+
 def print_stat(libdoc):
     print(f"{libdoc.type.lower()}: {libdoc.name}")
     print(f"  {len(libdoc.keywords)} Interactions")
@@ -266,24 +1036,170 @@ def print_stat(libdoc):
         print(f"  {len(libdoc.data_types.enums)} Data Types")
 
 
-def create_libdoc(lib_or_res, lib_name, lib_version, docformat, specdocformat):
+def create_libdoc(
+    lib_or_res, lib_name, lib_version, docformat, specdocformat, cache=None, timings=None
+):
+    # If given, timings is filled with the seconds spent for loading and converting.
+    timings = {} if timings is None else timings
+    from robot.libdocpkg import LibraryDocumentation
+
+    from .specreader import is_spec_file, read_spec
+
+    start = time.perf_counter()
+    if specdocformat == 'RAW' and is_spec_file(lib_or_res):
+        # Spec files are streamed, their keywords are read while writing.
+        try:
+            libdoc = read_spec(lib_or_res, lib_name, lib_version, docformat)
+        except:
+            sys.exit(f"The requested module {lib_or_res} could not be found.")
+        timings['load'] = time.perf_counter() - start
+        return libdoc
+    cache_key = None
+    if cache:
+        cache_key = cache.get_key(lib_or_res, lib_name, lib_version, docformat, specdocformat)
+        libdoc = cache.load(cache_key)
+        if libdoc:
+            timings['load'] = time.perf_counter() - start
+            return libdoc
     try:
         libdoc = LibraryDocumentation(lib_or_res, lib_name, lib_version, docformat)
+        timings['load'] = time.perf_counter() - start
         if specdocformat == 'HTML':
+            start = time.perf_counter()
             libdoc.convert_docs_to_html()
-        return libdoc
+            timings['convert'] = time.perf_counter() - start
     except:
         sys.exit(f"The requested module {lib_or_res} could not be found.")
+    if cache:
+        cache.store(cache_key, libdoc)
+    return libdoc
+
+
+def write_project_dump(
+    outfile,
+    libraries,
+    resources,
+    repo_id,
+    library_root,
+    resource_root,
+    attachment,
+    baseline=None,
+    emitter='xmlwriter',
+    stats=None,
+    convert_docs=False,
+    doc_converter=None,
+    shared_datatypes=False,
+    render_jobs=1,
+    first_pk=230,
+):
+    from .testbenchwriter import Libdoc2TestBenchWriter
+
+    testbench_writer = Libdoc2TestBenchWriter(
+        emitter=emitter,
+        convert_docs=convert_docs,
+        doc_converter=doc_converter,
+        shared_datatypes=shared_datatypes,
+        jobs=render_jobs,
+    )
+    start = time.perf_counter()
+    # Libdocs of a LibdocStream are loaded while writing.
+    load_seconds = stats.phase_seconds('load') if stats else 0.0
+    # The write method returns the last issued primary key.
+    last_issued_pk = testbench_writer.write(
+        libraries,
+        resources,
+        outfile,
+        repo_id,
+        library_root,
+        resource_root,
+        attachment,
+        baseline,
+        first_pk,
+    )
+    if stats:
+        seconds = time.perf_counter() - start
+        doc_converter = testbench_writer.context.doc_converter
+        # The timings of a shared converter are collected by its owner.
+        if doc_converter and doc_converter is not testbench_writer.doc_converter:
+            for name, convert_seconds in doc_converter.timings.items():
+                stats.add_library(name, {'convert': convert_seconds})
+                stats.add_phase('convert', convert_seconds)
+                seconds -= convert_seconds
+        seconds -= stats.phase_seconds('load') - load_seconds
+        stats.add_phase('write', seconds)
+        stats.add_elements(testbench_writer.context.element_counts)
+    if testbench_writer.context.delta_summary:
+        testbench_writer.context.delta_summary.print_summary()
+    return last_issued_pk
+
+
+def write_zip_file(
+    outfile_path,
+    libraries,
+    resources,
+    repo_id,
+    library_root,
+    resource_root,
+    attachment,
+    baseline=None,
+    emitter='xmlwriter',
+    stats=None,
+    convert_docs=False,
+    doc_converter=None,
+    shared_datatypes=False,
+    render_jobs=1,
+    compression='stored',
+    compresslevel=None,
+    fingerprint=None,
+    first_pk=230,
+):
+    """Writes the project dump and the attachments to a zip file and returns
+    the last issued primary key."""
+    from zipfile import ZipFile
 
+    from .compression import get_compression, write_attachments
+    from .fingerprint import fingerprint_comment
 
-def write_zip_file(outfile_path, project_dump_path, resources, attachment):
-    with ZipFile(outfile_path, 'w') as zip_file:
-        zip_file.write(project_dump_path, 'project-dump.xml')
+    compress_type = get_compression(compression)
+    with ZipFile(outfile_path, 'w', compress_type, compresslevel=compresslevel) as zip_file:
+        # The fingerprint of the inputs is used to skip unchanged outputs.
+        zip_file.comment = fingerprint_comment(fingerprint)
+        date_time = time.localtime()[:6]
+        # An entry opened by name gets the compression and level of the zip file.
+        with zip_file.open('project-dump.xml', 'w') as xml_file:
+            last_issued_pk = write_project_dump(
+                io.TextIOWrapper(xml_file, encoding='UTF-8'),
+                libraries,
+                resources,
+                repo_id,
+                library_root,
+                resource_root,
+                attachment,
+                baseline,
+                emitter,
+                stats,
+                convert_docs,
+                doc_converter,
+                shared_datatypes,
+                render_jobs,
+                first_pk,
+            )
+        # ZipFile.open dates entries given by name to 1980-01-01. The central
+        # directory, which is written on close and listed by zip tools, gets
+        # the time the dump was started.
+        zip_file.getinfo('project-dump.xml').date_time = date_time
 
+        start = time.perf_counter()
         # If there are attachments, add them to the zip-file.
         if resources and attachment:
-            # zip_file.write('attachments)
-            for libdoc in resources:
-                if os.path.exists(libdoc.source):
-                    file = os.path.split(libdoc.source)[-1]
-                    zip_file.write(libdoc.source, "attachments/" + file)
+            write_attachments(
+                zip_file,
+                [
+                    (libdoc.source, get_attachment_name(libdoc))
+                    for libdoc in resources
+                    if os.path.exists(libdoc.source)
+                ],
+            )
+    if stats:
+        stats.add_phase('zip', time.perf_counter() - start)
+    return last_issued_pk
@@ -0,0 +1,133 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Reading of previous project dumps for incremental (delta) exports.
+
+Interactions and data types are matched by their UID. Whether an element
+changed is decided by a content hash over its name, html-description and
+parameters or representatives. Parameter types are hashed by the UID of
+the referenced data type, because primary keys differ between dumps.
+"""
+
+import os
+from hashlib import sha1
+from xml.etree.ElementTree import ParseError, iterparse
+from zipfile import BadZipFile, ZipFile
+
+
+def content_hash(name: str, html_description: str, items) -> str:
+    """Hashes a test element. ``items`` are the parameters of an interaction
+    as (name, datatype UID) pairs or the representative names of a data type."""
+    content = [name, html_description or '']
+    for item in items:
+        content.append('\x1f'.join(item) if isinstance(item, tuple) else item)
+    return sha1('\x1e'.join(content).encode('UTF-8')).hexdigest()
+
+
+def read_baseline(path):
+    """Reads a project dump (zip or xml) and returns a dictionary that maps the
+    UIDs of all interactions and data types to (name, content hash) tuples.
+
+    Raises a ValueError if ``path`` cannot be read or is no project dump."""
+    try:
+        if os.path.splitext(path)[1].lower() == '.xml':
+            with open(path, 'rb') as xml_file:
+                return _read_project_dump(xml_file)
+        with ZipFile(path) as zip_file:
+            with zip_file.open('project-dump.xml') as xml_file:
+                return _read_project_dump(xml_file)
+    except KeyError:
+        raise ValueError(f"Baseline {path} does not contain a project-dump.xml.") from None
+    except BadZipFile:
+        raise ValueError(f"Baseline {path} is neither a zip file nor a .xml file.") from None
+    except (OSError, ParseError) as error:
+        raise ValueError(f"Baseline {path} cannot be read: {error}") from None
+
+
+def _read_project_dump(xml_file):
+    datatype_uids = {}
+    interactions = []
+    elements = {}
+    parser = iterparse(xml_file)
+    for _, node in parser:
+        if node.tag != 'element':
+            continue
+        element_type = node.get('type')
+        if element_type == 'datatype':
+            uid = node.findtext('uid')
+            datatype_uids[node.findtext('pk')] = uid
+            representatives = [
+                representative.findtext('name', '')
+                for representative in node.iter('representative')
+            ]
+            name = node.findtext('name')
+            elements[uid] = (
+                name,
+                content_hash(name, node.findtext('html-description'), representatives),
+            )
+        elif element_type == 'interaction':
+            parameters = [
+                (parameter.findtext('name', ''), parameter.find('datatype-ref').get('pk'))
+                for parameter in node.iter('parameter')
+            ]
+            interactions.append(
+                (
+                    node.findtext('uid'),
+                    node.findtext('name'),
+                    node.findtext('html-description'),
+                    parameters,
+                )
+            )
+        # Subdivisions only contain already processed elements.
+        node.clear()
+    if parser.root.tag != 'project-dump':
+        raise ParseError(f"root element is <{parser.root.tag}>, not <project-dump>")
+    # Data type references can only be resolved after all data types are known.
+    for uid, name, html_description, parameters in interactions:
+        parameters = [(param, datatype_uids.get(pk, '')) for param, pk in parameters]
+        elements[uid] = (name, content_hash(name, html_description, parameters))
+    return elements
+
+
+class DeltaSummary:
+    """Result of comparing the elements of an export against a baseline."""
+
+    def __init__(self):
+        self.unchanged = []
+        self.changed = []
+        self.added = []
+        self.removed = []
+
+    def compare(self, baseline: dict, current: dict):
+        """Compares two UID -> (name, content hash) dictionaries."""
+        for uid, (name, current_hash) in current.items():
+            if uid not in baseline:
+                self.added.append(name)
+            elif baseline[uid][1] != current_hash:
+                self.changed.append(name)
+            else:
+                self.unchanged.append(name)
+        self.removed = [name for uid, (name, _) in baseline.items() if uid not in current]
+
+    def print_summary(self):
+        print("Delta to baseline:")
+        print(f"  {len(self.unchanged)} unchanged")
+        for label, names in [
+            ('changed', self.changed),
+            ('added', self.added),
+            ('removed', self.removed),
+        ]:
+            print(f"  {len(names)} {label}")
+            for name in names:
+                print(f"    {name}")
@@ -0,0 +1,120 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Reading of batch manifests that describe several project dumps.
+
+A manifest is a JSON file with a list of outputs. Every output has its own
+libraries and writer options; options that are not given are taken from
+the command line:
+
+    {"outputs": [
+        {"libraries": "team-a.robot", "output": "team-a.zip", "repository": "ta"},
+        {"libraries": ["BuiltIn", "String"], "output": "team-b.xml", "xml": true,
+         "libraryroot": "Robot"}
+    ]}
+
+``libraries`` is either a list of libraries and resources or the path of an
+import list (or a single library or resource). Directories and glob patterns
+are scanned for resources, ``include`` and ``exclude`` are lists of patterns.
+"""
+
+import json
+import os
+
+# Keys of an output and the name of the command line argument they default to.
+OUTPUT_OPTIONS = {
+    'output': 'outfile_path',
+    'repository': 'repository',
+    'libraryroot': 'libraryroot',
+    'resourceroot': 'resourceroot',
+    'attachment': 'attachment',
+    'specdocformat': 'specdocformat',
+    'docformat': 'docformat',
+    'name': 'name',
+    'libversion': 'libversion',
+    'xml': 'xml',
+    'emitter': 'emitter',
+    'baseline': 'baseline',
+    'compression': 'compression',
+    'compresslevel': 'compresslevel',
+    'shareddatatypes': 'shared_datatypes',
+    'include': 'include',
+    'exclude': 'exclude',
+}
+
+
+def read_manifest(manifest_path: str, defaults: dict) -> list:
+    """Returns the outputs of a batch manifest as dicts with all keys of
+    OUTPUT_OPTIONS and ``libraries``. Missing options are taken from
+    ``defaults``, which maps command line argument names to values.
+    Raises a ValueError if the manifest is invalid or several outputs are
+    written to the same file."""
+    from . import get_outfile_path
+
+    with open(manifest_path, encoding='UTF-8') as manifest_file:
+        try:
+            manifest = json.load(manifest_file)
+        except ValueError as error:
+            raise ValueError(f"Batch manifest {manifest_path} is not valid JSON: {error}") from None
+    outputs = manifest.get('outputs') if isinstance(manifest, dict) else manifest
+    if not outputs:
+        raise ValueError(f"Batch manifest {manifest_path} does not contain any outputs.")
+
+    # Relative paths in the manifest are relative to the manifest itself.
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    result = []
+    # Output file -> index of the output writing it.
+    outfile_paths = {}
+    for index, output in enumerate(outputs):
+        if not isinstance(output, dict):
+            raise ValueError(f"Output {index} of batch manifest is not a JSON object.")
+        unknown = set(output) - set(OUTPUT_OPTIONS) - {'libraries'}
+        if unknown:
+            raise ValueError(f"Unknown keys in output {index} of batch manifest: {sorted(unknown)}")
+        if not output.get('libraries'):
+            raise ValueError(f"Output {index} of batch manifest has no libraries.")
+        if not output.get('output'):
+            raise ValueError(f"Output {index} of batch manifest has no output path.")
+        options = {key: output.get(key, defaults.get(arg)) for key, arg in OUTPUT_OPTIONS.items()}
+        libraries = output['libraries']
+        if isinstance(libraries, str):
+            libraries = [libraries]
+        options['libraries'] = [_resolve_path(entry, base_dir) for entry in libraries]
+        options['output'] = _resolve_path(options['output'], base_dir, must_exist=False)
+        if options['baseline']:
+            options['baseline'] = _resolve_path(options['baseline'], base_dir)
+        # Outputs are written concurrently, so they must not share a file.
+        outfile_path = os.path.normcase(
+            os.path.abspath(get_outfile_path(options['output'], [], options['xml']))
+        )
+        if outfile_path in outfile_paths:
+            raise ValueError(
+                f"Outputs {outfile_paths[outfile_path]} and {index} of batch manifest "
+                f"are both written to {outfile_path}."
+            )
+        outfile_paths[outfile_path] = index
+        result.append(options)
+    return result
+
+
+def _resolve_path(entry: str, base_dir: str, must_exist: bool = True) -> str:
+    # Library names like BuiltIn are kept as they are.
+    from .discovery import is_glob_pattern
+
+    if os.path.isabs(entry):
+        return entry
+    path = os.path.join(base_dir, entry)
+    if not must_exist or os.path.exists(path) or is_glob_pattern(entry):
+        return path
+    return entry
@@ -0,0 +1,70 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Compression of the entries of the project dump zip file.
+
+zipfile compresses an entry while it is written. The attachments are read
+in a thread pool, so the next files are read while an attachment is
+compressed (zlib, bz2 and lzma release the GIL), and are written to the
+archive in the order of the attachments. Entries are only added with the
+public ZipFile API, which holds the lock of the archive while it writes.
+"""
+
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Names of the --compression choices and their zipfile compression methods.
+COMPRESS_TYPES = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+
+def get_compression(name: str) -> int:
+    try:
+        return COMPRESS_TYPES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown compression '{name}', expected one of {', '.join(COMPRESS_TYPES)}."
+        ) from None
+
+
+def write_attachments(zip_file: zipfile.ZipFile, attachments, jobs: int = None):
+    """Adds the (path, arcname) ``attachments`` with the compression of ``zip_file``.
+
+    If the archive is compressed, the files of several attachments are read
+    concurrently while the previous ones are compressed."""
+    attachments = list(attachments)
+    if zip_file.compression == zipfile.ZIP_STORED or len(attachments) < 2:
+        for path, arcname in attachments:
+            zip_file.write(path, arcname)
+        return
+    paths, arcnames = zip(*attachments)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for zinfo, data in executor.map(read_attachment, paths, arcnames):
+            zip_file.writestr(
+                zinfo,
+                data,
+                compress_type=zip_file.compression,
+                compresslevel=zip_file.compresslevel,
+            )
+
+
+def read_attachment(path: str, arcname: str):
+    """Returns the ZipInfo and the content of the file at ``path``."""
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    with open(path, 'rb') as attachment:
+        return zinfo, attachment.read()
@@ -0,0 +1,269 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Discovery of resource files in directories and glob patterns.
+
+Import lists and the command line accept directories and glob patterns
+like ``resources/**/*.resource`` besides libraries and files. A directory
+is scanned for files matching the include patterns, ``*.resource`` by
+default. Version control directories, virtualenvs and caches are skipped.
+The directories of a tree level are scanned concurrently in a thread pool,
+os.scandir releases the GIL while it waits for the file system.
+
+Patterns are matched with fnmatch against the file name and against the
+path relative to the scan root: the scanned directory or the base directory
+of a glob pattern, its part without wildcards. The files found are returned
+sorted, so the output does not depend on the order of the file system.
+
+A file in a subdirectory of the scan root is named after its relative path,
+e.g. ``a/keywords.resource`` is the resource ``a.keywords``, so files with
+the same name in several directories get different subdivisions and UIDs.
+"""
+
+import fnmatch
+import os
+import re
+
+DEFAULT_INCLUDE = ['*.resource']
+
+# Extensions of resource files and libdoc spec files like in robot.libdocpkg,
+# which is not imported to scan.
+RESOURCE_EXTENSIONS = ('resource', 'robot', 'txt', 'tsv', 'rst', 'rest')
+SPEC_EXTENSIONS = ('xml', 'libspec', 'json')
+
+# Directories that never contain resources of the project.
+SKIPPED_DIRS = {
+    '__pycache__',
+    'node_modules',
+    'site-packages',
+    'venv',
+}
+
+_GLOB_CHARS = re.compile(r'[*?[]')
+
+
+def is_glob_pattern(entry: str) -> bool:
+    return bool(_GLOB_CHARS.search(entry)) and not os.path.exists(entry)
+
+
+def is_scanned_directory(entry: str) -> bool:
+    # A directory with an __init__.py is a library package.
+    return os.path.isdir(entry) and not os.path.isfile(os.path.join(entry, '__init__.py'))
+
+
+def is_skipped_directory(path: str) -> bool:
+    """Returns whether the directory ``path`` is never scanned, e.g. a version
+    control directory, a virtualenv or a cache."""
+    return _is_skipped_name(os.path.basename(os.path.normpath(path))) or _is_virtualenv(path)
+
+
+def is_expandable(entry: str) -> bool:
+    """Returns whether ``entry`` is a directory or glob pattern of several files."""
+    return is_glob_pattern(entry) or is_scanned_directory(entry)
+
+
+def expand_entries(
+    entries, include=None, exclude=None, jobs: int = None, names: dict = None
+) -> list:
+    """Returns the entries with directories and glob patterns replaced by the
+    files they contain. Other entries and the order of the entries are kept,
+    files found more than once are only returned the first time.
+
+    ``include`` patterns select the files of directories, ``exclude``
+    patterns remove files of directories and glob patterns. ``jobs`` is the
+    number of threads scanning a directory. If given, ``names`` is filled
+    with file -> name of the files found in subdirectories of a scan root."""
+    names = {} if names is None else names
+    result = []
+    for entry in entries:
+        # Only the first scan root of a file names it.
+        found_names = {}
+        if is_glob_pattern(entry):
+            result.extend(glob_files(entry, exclude, found_names))
+        elif is_scanned_directory(entry):
+            result.extend(scan_directory(entry, include, exclude, jobs, found_names))
+        else:
+            result.append(entry)
+        for path, name in found_names.items():
+            names.setdefault(path, name)
+    return list(dict.fromkeys(result))
+
+
+def check_unique_names(entries, names: dict = None):
+    """Raises a ValueError if two entries would be written as libraries or
+    resources with the same UID. ``names`` are the names of expand_entries,
+    the names of spec files are only known once they are loaded."""
+    names = names or {}
+    found = {}
+    for entry in entries:
+        name = names.get(entry) or get_default_name(entry)
+        if name is None:
+            continue
+        # Normalized like the UIDs of subdivisions.
+        key = name.replace('_', '').replace(' ', '').lower()
+        if key in found:
+            raise ValueError(
+                f"'{found[key]}' and '{entry}' would both be written as the library or "
+                f"resource '{name}'. Rename one of them or write them to separate dumps."
+            )
+        found[key] = entry
+
+
+def get_default_name(entry: str):
+    """Returns the name Robot Framework gives the library or resource of an
+    entry or None for spec files."""
+    extension = os.path.splitext(entry)[1][1:].lower()
+    if extension in SPEC_EXTENSIONS:
+        return None
+    if os.path.exists(entry) or extension in RESOURCE_EXTENSIONS:
+        # Also a resource file in PYTHONPATH.
+        return os.path.splitext(os.path.basename(os.path.normpath(entry)))[0]
+    # Libraries are named like they are imported.
+    return entry
+
+
+def glob_files(pattern: str, exclude=None, names: dict = None) -> list:
+    """Returns the sorted files matching the glob ``pattern``, ``**`` matches
+    any number of directories. Skipped directories are not walked.
+
+    The scan root is the base directory of the pattern, its part without
+    wildcards. If given, ``names`` is filled like by expand_entries."""
+    parts = os.path.normpath(pattern).split(os.sep)
+    # The directories matched by the pattern are checked, not its base.
+    base_parts = 0
+    for part in parts:
+        if _GLOB_CHARS.search(part):
+            break
+        base_parts += 1
+    base = os.sep.join(parts[:base_parts])
+    if parts[:base_parts] == ['']:
+        base = os.sep
+    files = set()
+    for path in _glob(base, parts[base_parts:]):
+        relative_path = os.path.relpath(path, base or os.curdir).replace(os.sep, '/')
+        if exclude and _matches(path, relative_path, exclude):
+            continue
+        files.add(os.path.normpath(path))
+    files = sorted(files)
+    if names is not None:
+        _add_names(files, base, names)
+    return files
+
+
+def _glob(directory: str, parts: list):
+    # Yields the files below directory matching the pattern parts. Like
+    # glob, names starting with a dot are only matched by such a part.
+    part, rest = parts[0], parts[1:]
+    if part == '**' and rest:
+        yield from _glob(directory, rest)
+    try:
+        with os.scandir(directory or os.curdir) as scanned:
+            entries = list(scanned)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith('.') and not part.startswith('.'):
+            continue
+        # Without the ./ prefix of os.curdir, like glob.
+        path = os.path.join(directory, entry.name)
+        try:
+            if part == '**':
+                if entry.is_dir(follow_symlinks=False):
+                    if not is_skipped_directory(path):
+                        yield from _glob(path, parts)
+                elif not rest and entry.is_file():
+                    yield path
+            elif fnmatch.fnmatch(entry.name, part):
+                if not rest:
+                    if entry.is_file():
+                        yield path
+                elif entry.is_dir() and not is_skipped_directory(path):
+                    yield from _glob(path, rest)
+        except OSError:
+            continue
+
+
+def scan_directory(
+    directory: str, include=None, exclude=None, jobs: int = None, names: dict = None
+) -> list:
+    """Returns the sorted files below ``directory`` that match one of the
+    ``include`` patterns and none of the ``exclude`` patterns. If given,
+    ``names`` is filled like by expand_entries."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    include = include or DEFAULT_INCLUDE
+    exclude = exclude or []
+    files = []
+    directories = [directory]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Breadth first, one tree level at a time.
+        while directories:
+            next_directories = []
+            for level_files, subdirectories in executor.map(_scan, directories):
+                files.extend(level_files)
+                next_directories.extend(subdirectories)
+            directories = next_directories
+    result = []
+    for path in files:
+        relative_path = os.path.relpath(path, directory).replace(os.sep, '/')
+        if _matches(path, relative_path, include) and not _matches(path, relative_path, exclude):
+            result.append(os.path.normpath(path))
+    if names is not None:
+        _add_names(result, directory, names)
+    return sorted(result)
+
+
+def _add_names(files, root: str, names: dict):
+    # Files directly in the scan root keep the name Robot Framework gives them.
+    for path in files:
+        parts = os.path.splitext(os.path.relpath(path, root or os.curdir))[0].split(os.sep)
+        if len(parts) > 1:
+            names[path] = '.'.join(parts)
+
+
+def _scan(directory: str):
+    # Returns the files and the subdirectories to scan of a directory.
+    files, subdirectories = [], []
+    try:
+        with os.scandir(directory) as scanned:
+            for entry in scanned:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_skipped_directory(entry.path):
+                            subdirectories.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        # Unreadable directories are skipped like os.walk does.
+        pass
+    return files, subdirectories
+
+
+def _is_skipped_name(name: str) -> bool:
+    # Hidden directories like .git, .tox or .venv are skipped, too.
+    return name in SKIPPED_DIRS or (name.startswith('.') and name not in ('.', '..'))
+
+
+def _is_virtualenv(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, 'pyvenv.cfg'))
+
+
+def _matches(path: str, relative_path: str, patterns) -> bool:
+    name = os.path.basename(path)
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in patterns
+    )
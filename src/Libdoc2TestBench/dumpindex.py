@@ -0,0 +1,332 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Index of the test elements of existing project dumps.
+
+Started with ``Libdoc2TestBench inspect``. The project-dump.xml of a zip
+file is streamed out of the archive and parsed with iterparse. Every read
+node is removed from the tree, so the memory does not grow with the size
+of a dump.
+The subdivisions, interactions and data types of all dumps are kept in a
+SQLite database together with their dump, primary key, UID and library:
+
+    Libdoc2TestBench inspect dumps/                  # index and summarize
+    Libdoc2TestBench inspect dumps/ --uid itb-IA-0123456789
+    Libdoc2TestBench inspect --name "Should Be*"
+
+A dump is only parsed again when its size or modification time changed.
+"""
+
+import argparse
+import os
+import sqlite3
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+DEFAULT_INDEX = 'project-dumps.sqlite'
+DUMP_PATTERNS = ['*.zip', '*.xml']
+ELEMENT_TYPES = ['subdivision', 'interaction', 'datatype']
+
+# Increase whenever the schema or the indexed content changes.
+INDEX_FORMAT = 1
+
+_SCHEMA = """
+CREATE TABLE dumps (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    repository TEXT,
+    created_time TEXT
+);
+CREATE TABLE elements (
+    dump_id INTEGER NOT NULL,
+    pk INTEGER,
+    uid TEXT,
+    name TEXT COLLATE NOCASE,
+    type TEXT,
+    library TEXT
+);
+CREATE INDEX elements_uid ON elements (uid);
+CREATE INDEX elements_name ON elements (name);
+CREATE INDEX elements_dump ON elements (dump_id);
+"""
+
+DumpElement = namedtuple('DumpElement', ['pk', 'uid', 'name', 'type', 'library'])
+Match = namedtuple('Match', ['path', 'pk', 'uid', 'name', 'type', 'library'])
+
+
+def iter_dump_elements(path: str, header: dict = None):
+    """Yields a DumpElement for every subdivision, interaction and data type
+    of a project dump (zip or xml) in document order.
+
+    ``library`` is the name of the library or resource subdivision an
+    element belongs to, None for the root subdivisions and the shared
+    _Datatypes subdivision. If given, ``header`` is filled with the
+    ``repository`` and ``created_time`` of the dump."""
+    if os.path.splitext(path)[1].lower() == '.xml':
+        with open(path, 'rb') as xml_file:
+            yield from _iter_elements(xml_file, path, header)
+        return
+    from zipfile import ZipFile
+
+    with ZipFile(path) as zip_file:
+        try:
+            xml_file = zip_file.open('project-dump.xml')
+        except KeyError:
+            raise ValueError(f"{path} does not contain a project-dump.xml.") from None
+        with xml_file:
+            yield from _iter_elements(xml_file, path, header)
+
+
+def _iter_elements(xml_file, path: str, header: dict = None):
+    header = {} if header is None else header
+    # The open nodes and the open test elements as [depth, pk, uid, name, type].
+    nodes = []
+    open_elements = []
+    for event, node in iterparse(xml_file, events=('start', 'end')):
+        if event == 'start':
+            if not nodes:
+                if node.tag != 'project-dump':
+                    raise ValueError(f"{path} is not a project dump.")
+                header['repository'] = node.get('repository')
+            elif node.tag == 'element':
+                open_elements.append([len(nodes), None, None, None, node.get('type')])
+            nodes.append(node)
+            continue
+        nodes.pop()
+        depth = len(nodes)
+        if node.tag == 'createdTime' and depth == 2:
+            header['created_time'] = node.text
+        elif open_elements and depth == open_elements[-1][0] + 1:
+            # A direct child of the innermost open test element.
+            if node.tag in ('pk', 'uid', 'name'):
+                field = ('pk', 'uid', 'name').index(node.tag) + 1
+                open_elements[-1][field] = node.text
+        elif node.tag == 'element':
+            _, pk, uid, name, element_type = open_elements.pop()
+            yield DumpElement(
+                int(pk) if pk else None,
+                uid,
+                name,
+                element_type,
+                _get_library(open_elements, name, element_type),
+            )
+        if nodes:
+            # Read nodes are removed, so the tree only holds the open nodes.
+            del nodes[-1][:]
+
+
+def _get_library(parents, name, element_type):
+    # Libraries are the subdivisions in the root subdivisions RF and
+    # Resource. The shared _Datatypes subdivision is a root subdivision.
+    if parents and parents[0][3] == '_Datatypes':
+        return None
+    if len(parents) >= 2:
+        return parents[1][3]
+    if len(parents) == 1 and element_type == 'subdivision':
+        return name
+    return None
+
+
+class DumpIndex:
+    """A persistent SQLite index of the test elements of project dumps."""
+
+    def __init__(self, index_path: str = DEFAULT_INDEX):
+        self.index_path = index_path
+        self._connection = sqlite3.connect(index_path)
+        version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_FORMAT:
+            # Indexes of other versions are rebuilt from the dumps.
+            with self._connection:
+                self._connection.execute('DROP TABLE IF EXISTS elements')
+                self._connection.execute('DROP TABLE IF EXISTS dumps')
+                self._connection.executescript(_SCHEMA)
+                self._connection.execute(f'PRAGMA user_version = {INDEX_FORMAT}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def update(self, path: str) -> bool:
+        """Indexes the dump at ``path`` if it is new or changed since it was
+        indexed. Returns whether it was indexed."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self._connection.execute(
+            'SELECT id, size, mtime_ns FROM dumps WHERE path = ?', (path,)
+        ).fetchone()
+        if row and row[1:] == (stat.st_size, stat.st_mtime_ns):
+            return False
+        header = {}
+        with self._connection:
+            if row:
+                self._remove(row[0])
+            dump_id = self._connection.execute(
+                'INSERT INTO dumps (path, size, mtime_ns) VALUES (?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).lastrowid
+            self._connection.executemany(
+                'INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?)',
+                ((dump_id, *element) for element in iter_dump_elements(path, header)),
+            )
+            self._connection.execute(
+                'UPDATE dumps SET repository = ?, created_time = ? WHERE id = ?',
+                (header.get('repository'), header.get('created_time'), dump_id),
+            )
+        return True
+
+    def prune(self) -> list:
+        """Removes the dumps that do not exist anymore and returns their paths."""
+        removed = []
+        with self._connection:
+            for dump_id, path in self._connection.execute('SELECT id, path FROM dumps').fetchall():
+                if not os.path.exists(path):
+                    self._remove(dump_id)
+                    removed.append(path)
+        return removed
+
+    def _remove(self, dump_id: int):
+        self._connection.execute('DELETE FROM elements WHERE dump_id = ?', (dump_id,))
+        self._connection.execute('DELETE FROM dumps WHERE id = ?', (dump_id,))
+
+    def find(self, uid: str = None, name: str = None, element_type: str = None, paths=None):
+        """Returns the Matches of the elements with the ``uid`` or a name
+        matching the ``name`` pattern, in which ``*`` and ``?`` are wildcards
+        and case is ignored. ``paths`` limits the search to these dumps."""
+        conditions, parameters = [], []
+        if uid:
+            conditions.append('e.uid = ?')
+            parameters.append(uid)
+        if name:
+            conditions.append("e.name LIKE ? ESCAPE '\\'")
+            parameters.append(_like_pattern(name))
+        if element_type:
+            conditions.append('e.type = ?')
+            parameters.append(element_type)
+        self._add_paths_condition(paths, conditions, parameters)
+        query = (
+            'SELECT d.path, e.pk, e.uid, e.name, e.type, e.library '
+            'FROM elements e JOIN dumps d ON d.id = e.dump_id'
+        )
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY d.path, e.pk'
+        return [Match(*row) for row in self._connection.execute(query, parameters)]
+
+    def summary(self, paths=None) -> list:
+        """Returns (dump path, library, interactions, data types) per library
+        of the indexed dumps or of ``paths``."""
+        conditions, parameters = ['e.library IS NOT NULL'], []
+        self._add_paths_condition(paths, conditions, parameters)
+        query = (
+            'SELECT d.path, e.library, '
+            "SUM(e.type = 'interaction'), SUM(e.type = 'datatype') "
+            'FROM elements e JOIN dumps d ON d.id = e.dump_id '
+            f"WHERE {' AND '.join(conditions)} "
+            'GROUP BY d.path, e.library ORDER BY d.path, MIN(e.pk)'
+        )
+        return self._connection.execute(query, parameters).fetchall()
+
+    def _add_paths_condition(self, paths, conditions: list, parameters: list):
+        if paths is None:
+            return
+        paths = [os.path.abspath(path) for path in paths]
+        conditions.append(f"d.path IN ({', '.join('?' * len(paths))})")
+        parameters.extend(paths)
+
+
+def _like_pattern(pattern: str) -> str:
+    # Converts a * and ? wildcard pattern to an escaped LIKE pattern.
+    for char in ('\\', '%', '_'):
+        pattern = pattern.replace(char, '\\' + char)
+    return pattern.replace('*', '%').replace('?', '_')
+
+
+def find_dumps(paths) -> list:
+    """Returns the dump files of ``paths``, directories are scanned for zip
+    and xml files."""
+    from .discovery import expand_entries
+
+    return expand_entries(paths, include=DUMP_PATTERNS)
+
+
+def start_inspect(argv=None):
+    """Command line entry point of ``Libdoc2TestBench inspect``."""
+    parser = argparse.ArgumentParser(
+        prog='Libdoc2TestBench inspect',
+        description='Indexes the interactions, data types and subdivisions of project dumps '
+        'in a SQLite database and looks them up by UID or name. Without a lookup, '
+        'the interactions and data types per library are printed.',
+    )
+    parser.add_argument(
+        'dumps',
+        nargs='*',
+        metavar='DUMP',
+        help='Project dumps (zip or xml), directories or glob patterns to index. '
+        'Lookups search all indexed dumps if none are given.',
+    )
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f'default = {DEFAULT_INDEX}')
+    parser.add_argument('--uid', help='Finds the elements with this UID.')
+    parser.add_argument(
+        '--name', help='Finds the elements with this name, * and ? are wildcards, case is ignored.'
+    )
+    parser.add_argument('--type', choices=ELEMENT_TYPES, help='Finds only elements of this type.')
+    parser.add_argument(
+        '--prune', action='store_true', help='Removes dumps that do not exist anymore.'
+    )
+    args = parser.parse_args(argv)
+    from zipfile import BadZipFile
+
+    paths = find_dumps(args.dumps) if args.dumps else None
+    with DumpIndex(args.index) as index:
+        if args.prune:
+            for path in index.prune():
+                print(f"Removed: {path}")
+        for path in paths or []:
+            try:
+                if index.update(path):
+                    print(f"Indexed: {path}")
+            except (OSError, ValueError, SyntaxError, BadZipFile) as error:
+                # Other zip and xml files in scanned directories are skipped.
+                print(f"Skipped: {path}: {error}")
+        if args.uid or args.name or args.type:
+            _print_matches(index.find(args.uid, args.name, args.type, paths))
+        else:
+            _print_summary(index.summary(paths))
+
+
+def _print_matches(matches):
+    print(f"{'PK':>8}  {'Type':<12}{'Library':<30}{'Name':<40}{'UID':<24}Dump")
+    for match in matches:
+        print(
+            f"{match.pk or '':>8}  {match.type:<12}{match.library or '':<30}{match.name or '':<40}"
+            f"{match.uid or '':<24}{match.path}"
+        )
+    print(f"{len(matches)} elements found.")
+
+
+def _print_summary(rows):
+    current_path = None
+    for path, library, interactions, datatypes in rows:
+        if path != current_path:
+            print(path)
+            print(f"  {'Library':<40}{'Interactions':>14}{'Data Types':>12}")
+            current_path = path
+        print(f"  {library:<40}{interactions:>14}{datatypes:>12}")
@@ -0,0 +1,87 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Fingerprints of the inputs of a project dump to skip unchanged outputs.
+
+The fingerprint covers the import lists, the sources of their entries,
+the writer options and the versions of Libdoc2TestBench, Robot Framework
+and Python. It is computed without importing any library and is stored as
+the comment of the written zip file.
+"""
+
+import json
+import platform
+from hashlib import sha1
+from pathlib import Path
+
+from .libdoccache import find_source, source_fingerprint
+
+# Increase whenever the output changes for the same inputs.
+FINGERPRINT_FORMAT = 1
+
+COMMENT_PREFIX = b'Libdoc2TestBench inputs '
+
+
+def input_fingerprint(libraries: list, options: dict):
+    """Returns the fingerprint of the libraries, resources or import lists and
+    the writer options or None if the source of an entry cannot be found.
+
+    ``options`` maps the keys of batch.OUTPUT_OPTIONS to their values, the
+    baseline is fingerprinted by its content."""
+    from . import __version__, get_entries, read_import_list, robot_version_print
+
+    inputs = []
+    for library in libraries:
+        entries = get_entries(library, options.get('include'), options.get('exclude'))
+        if read_import_list(library):
+            inputs.append(['import list', source_fingerprint(library)])
+        for entry in entries or [library]:
+            source = find_source(entry)
+            if not source:
+                return None
+            inputs.append([entry, str(Path(source).resolve()), source_fingerprint(source)])
+    options = dict(options)
+    options.pop('output', None)
+    if options.get('baseline'):
+        options['baseline'] = source_fingerprint(options['baseline'])
+    return sha1(
+        json.dumps(
+            [
+                FINGERPRINT_FORMAT,
+                __version__,
+                robot_version_print(),
+                platform.python_version(),
+                sorted(options.items()),
+                inputs,
+            ]
+        ).encode()
+    ).hexdigest()
+
+
+def fingerprint_comment(fingerprint) -> bytes:
+    return COMMENT_PREFIX + fingerprint.encode() if fingerprint else b''
+
+
+def is_up_to_date(outfile_path: str, fingerprint) -> bool:
+    """Returns True if the zip file at ``outfile_path`` was written from inputs
+    with the given fingerprint."""
+    from zipfile import BadZipFile, ZipFile
+
+    if not fingerprint:
+        return False
+    try:
+        with ZipFile(outfile_path) as zip_file:
+            return zip_file.comment == fingerprint_comment(fingerprint)
+    except (OSError, BadZipFile):
+        return False
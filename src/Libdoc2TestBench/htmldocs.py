@@ -0,0 +1,152 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  This code contains derived code from Robot Framework Core Project
+#  under Apache 2.0 License.
+#  https://github.com/robotframework/robotframework
+
+"""Lazy and memoized conversion of libdoc documentation to HTML.
+
+The result is the same as LibraryDoc.convert_docs_to_html(), but a doc is
+only converted when it is written. Converting a doc consists of formatting
+it, which only depends on the doc and its format, and linking the names of
+keywords and data types of its library. The formatting is memoized by a
+content hash and shared across all libraries of a run. The memo keeps the
+MEMO_SIZE most recently used docs, so a long-running server does not grow
+without bound.
+
+Robot Framework formats ROBOT docs with a single module-level HtmlFormatter
+that keeps state while formatting, so docs are converted by one thread at
+a time, also by different converters.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha1
+from weakref import WeakKeyDictionary
+
+from robot.libdocpkg.htmlutils import DocFormatter
+
+# Guards robot.utils.html_format and the state of all converters.
+_CONVERT_LOCK = threading.Lock()
+
+# Maximum number of formatted docs kept by a converter.
+MEMO_SIZE = 50000
+
+
+def get_doc_key(doc_format: str, doc: str) -> tuple:
+    return doc_format, sha1(doc.encode('UTF-8')).digest()
+
+
+def _trim_memo(memo: OrderedDict, max_size: int):
+    # The least recently used docs are dropped first.
+    while len(memo) > max_size:
+        memo.popitem(last=False)
+
+
+class _MemoizedDocToHtml:
+    def __init__(self, doc_to_html, doc_format: str, memo: OrderedDict, max_size: int):
+        self._doc_to_html = doc_to_html
+        self._doc_format = doc_format
+        self._memo = memo
+        self._max_size = max_size
+
+    def __call__(self, doc: str) -> str:
+        key = get_doc_key(self._doc_format, doc)
+        html = self._memo.get(key)
+        if html is None:
+            html = self._memo[key] = self._doc_to_html(doc)
+            _trim_memo(self._memo, self._max_size)
+        else:
+            self._memo.move_to_end(key)
+        return html
+
+
+class HtmlDocConverter:
+    """A class to convert the docs of libdocs to HTML on first use.
+
+    One converter is shared by all libraries of a run. It can be shared by
+    writers in several threads, e.g. in batch and server mode."""
+
+    def __init__(self, memo: dict = None, max_size: int = MEMO_SIZE):
+        # (doc format, sha1 of doc) -> formatted doc, least recently used first
+        self._memo = OrderedDict(memo or ())
+        self._max_size = max_size
+        _trim_memo(self._memo, max_size)
+        self._formatters = WeakKeyDictionary()
+        # Libdoc name -> seconds spent converting its docs
+        self.timings = {}
+
+    def library_doc(self, libdoc) -> str:
+        return self._convert(libdoc, libdoc.doc, intro=True)
+
+    def keyword_doc(self, libdoc, keyword) -> str:
+        return self._convert(libdoc, keyword.doc)
+
+    def type_doc(self, libdoc, data_type) -> str:
+        return self._convert(libdoc, data_type.doc)
+
+    @property
+    def memo_size(self) -> int:
+        return len(self._memo)
+
+    def get_memo(self) -> dict:
+        """Returns the formatted docs. The result can be given to another
+        converter, e.g. in another process."""
+        with _CONVERT_LOCK:
+            return dict(self._memo)
+
+    def get_library_docs(self, libdoc) -> dict:
+        """Returns the formatted docs of the library, its keywords and data
+        types that are in the memo."""
+        docs = [libdoc.doc]
+        docs.extend(keyword.doc for keyword in libdoc.keywords)
+        docs.extend(data_type.doc for data_type in libdoc.data_types)
+        keys = [get_doc_key(libdoc.doc_format, doc) for doc in docs if doc]
+        with _CONVERT_LOCK:
+            return {key: self._memo[key] for key in keys if key in self._memo}
+
+    def update_memo(self, memo: dict):
+        """Adds the formatted docs of another converter."""
+        with _CONVERT_LOCK:
+            self._memo.update(memo)
+            _trim_memo(self._memo, self._max_size)
+
+    def add_timings(self, timings: dict):
+        """Adds the libdoc name -> seconds ``timings`` of another converter."""
+        with _CONVERT_LOCK:
+            for name, seconds in timings.items():
+                self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def _convert(self, libdoc, doc: str, intro: bool = False) -> str:
+        with _CONVERT_LOCK:
+            start = time.perf_counter()
+            html = self._get_formatter(libdoc).html(doc, intro=intro)
+            self.timings[libdoc.name] = self.timings.get(libdoc.name, 0.0) + (
+                time.perf_counter() - start
+            )
+        return html
+
+    def _get_formatter(self, libdoc) -> DocFormatter:
+        formatter = self._formatters.get(libdoc)
+        if formatter is None:
+            formatter = DocFormatter(
+                libdoc.keywords, libdoc.data_types, libdoc.doc, libdoc.doc_format
+            )
+            formatter._doc_to_html = _MemoizedDocToHtml(
+                formatter._doc_to_html, libdoc.doc_format, self._memo, self._max_size
+            )
+            self._formatters[libdoc] = formatter
+        return formatter
@@ -0,0 +1,273 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Persistent on-disk cache for converted Robot Framework libdocs.
+
+Each cache entry is a libdoc JSON spec stored as ``<entry>-<key>.json``.
+The key covers the import list entry, a fingerprint of its source files,
+the libdoc arguments and the Robot Framework version. Entries are evicted
+least recently used first as soon as the cache exceeds its size limit.
+
+The specs keep the docs in their original format, the docs converted to
+HTML are stored per library as ``html-<name>.json``. They are keyed by
+their format and a hash of the original doc, like the memo of the
+htmldocs.HtmlDocConverter, so docs of an older version are never used.
+
+The LibdocStore keeps libdocs in memory instead, for the server and watch
+modes, and loads an entry again when its source changed.
+"""
+
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+from hashlib import sha1
+from pathlib import Path
+
+# Increase whenever the layout of the cached specs changes.
+CACHE_FORMAT = 1
+
+# Default size limit of the cache directory in megabytes.
+DEFAULT_CACHE_SIZE = 256
+
+
+class LibdocCache:
+    """A directory of serialized libdoc specs.
+
+    Instances are plain data and can be handed to worker processes."""
+
+    def __init__(self, cache_dir, max_size_mb: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size_mb * 1024 * 1024
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, key):
+        """Returns the cached libdoc for ``key`` or None on a cache miss."""
+        if key is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='UTF-8') as spec_file:
+                spec = json.load(spec_file)
+        except (OSError, ValueError):
+            return None
+        # Touch the entry, the mtime is used as last access time for eviction.
+        os.utime(path)
+        from robot.libdocpkg.jsonbuilder import JsonDocBuilder
+
+        return JsonDocBuilder().build_from_dict(spec)
+
+    def store(self, key, libdoc):
+        if key is None:
+            return
+        path = self._path(key)
+        for stale in self.cache_dir.glob(f"{self._prefix(key)}-*.json"):
+            if stale != path:
+                self._remove(stale)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='UTF-8') as spec_file:
+            spec_file.write(libdoc.to_json())
+        os.replace(temp_path, path)
+        self.evict()
+
+    def load_docs(self, libdoc) -> dict:
+        """Returns the HTML docs stored for ``libdoc`` by store_docs."""
+        path = self._docs_path(libdoc)
+        try:
+            with open(path, encoding='UTF-8') as docs_file:
+                stored = json.load(docs_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(stored, dict) or stored.get('format') != CACHE_FORMAT:
+            return {}
+        os.utime(path)
+        return {
+            (doc_format, bytes.fromhex(doc_hash)): html
+            for doc_format, doc_hash, html in stored['docs']
+        }
+
+    def store_docs(self, libdoc, docs: dict):
+        """Stores the (doc format, sha1 of doc) -> HTML ``docs`` of ``libdoc``,
+        see htmldocs.HtmlDocConverter.get_library_docs."""
+        if not docs:
+            return
+        path = self._docs_path(libdoc)
+        stored = {
+            'format': CACHE_FORMAT,
+            'docs': [
+                [doc_format, doc_hash.hex(), html] for (doc_format, doc_hash), html in docs.items()
+            ],
+        }
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='UTF-8') as docs_file:
+            json.dump(stored, docs_file)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the size limit is kept."""
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def get_key(self, lib_or_res, lib_name, lib_version, docformat, specdocformat):
+        """Returns the cache key of an entry or None if its source is unknown."""
+        source = find_source(lib_or_res)
+        if not source:
+            return None
+        from robot.version import get_version as robot_version
+
+        fingerprint = sha1(
+            json.dumps(
+                [
+                    CACHE_FORMAT,
+                    lib_or_res,
+                    str(Path(source).resolve()),
+                    source_fingerprint(source),
+                    lib_name,
+                    lib_version,
+                    docformat,
+                    specdocformat,
+                    robot_version(),
+                ]
+            ).encode()
+        ).hexdigest()
+        return lib_or_res, fingerprint
+
+    def _path(self, key):
+        return self.cache_dir.joinpath(f"{self._prefix(key)}-{key[1]}.json")
+
+    def _docs_path(self, libdoc):
+        # Prefixes of specs contain no '-', so store never removes these as stale.
+        name = re.sub(r'[^\w.]+', '_', libdoc.name)
+        source = libdoc.source or libdoc.name
+        return self.cache_dir.joinpath(f"html-{name}_{sha1(source.encode()).hexdigest()[:8]}.json")
+
+    @staticmethod
+    def _prefix(key):
+        name = re.sub(r'[^\w.]+', '_', os.path.basename(key[0].rstrip('/\\')))
+        return f"{name}_{sha1(key[0].encode()).hexdigest()[:8]}"
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class LibdocStore:
+    """A class to keep loaded libdocs in memory as compact model.LibraryModels.
+    A libdoc is reloaded as soon as the fingerprint of its source changes."""
+
+    def __init__(self):
+        self._libdocs = {}
+        # Importing libraries is not thread-safe.
+        self._lock = threading.Lock()
+
+    def get(self, lib_or_res, lib_name=None, lib_version=None, docformat=None):
+        from . import create_libdoc
+        from .model import build_library
+
+        key = (lib_or_res, lib_name, lib_version, docformat)
+        with self._lock:
+            source = find_source(lib_or_res)
+            fingerprint = source_fingerprint(source) if source else None
+            if key in self._libdocs:
+                libdoc, loaded_fingerprint = self._libdocs[key]
+                if loaded_fingerprint == fingerprint:
+                    return libdoc
+                _unload_modules(source)
+            libdoc = build_library(
+                create_libdoc(lib_or_res, lib_name, lib_version, docformat, 'RAW')
+            )
+            self._libdocs[key] = (libdoc, fingerprint)
+            return libdoc
+
+
+def _unload_modules(source):
+    # Python modules are cached in sys.modules and would not be imported again.
+    if not source:
+        return
+    source = os.path.normcase(os.path.abspath(source))
+    if os.path.isfile(source):
+        source = os.path.splitext(source)[0]
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, '__file__', None)
+        if module_file and os.path.normcase(os.path.abspath(module_file)).startswith(source):
+            del sys.modules[name]
+
+
+def find_source(lib_or_res):
+    """Returns the file or package directory an entry is loaded from without
+    importing it."""
+    if os.path.exists(lib_or_res):
+        return lib_or_res
+    try:
+        spec = importlib.util.find_spec(lib_or_res)
+    except (ImportError, ValueError):
+        spec = None
+    if not spec:
+        # Standard libraries like BuiltIn are imported from robot.libraries.
+        # They are looked up in the robot package, finding their spec would
+        # import Robot Framework.
+        return _find_standard_library(lib_or_res)
+    if not spec.origin or not os.path.exists(spec.origin):
+        return None
+    if spec.submodule_search_locations:
+        return os.path.dirname(spec.origin)
+    return spec.origin
+
+
+def _find_standard_library(name):
+    try:
+        robot_spec = importlib.util.find_spec('robot')
+    except (ImportError, ValueError):
+        return None
+    for location in (robot_spec and robot_spec.submodule_search_locations) or []:
+        path = os.path.join(location, 'libraries', f"{name}.py")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def source_fingerprint(source):
+    """Returns a hash of a source file or of the files of a package directory."""
+    if os.path.isfile(source):
+        with open(source, 'rb') as source_file:
+            return sha1(source_file.read()).hexdigest()
+    from .discovery import is_skipped_directory
+
+    # Packages are fingerprinted by the size and mtime of their files.
+    # Caches, virtualenvs and version control directories are left out.
+    files = []
+    for root, dirs, filenames in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if not is_skipped_directory(os.path.join(root, d)))
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            stat = os.stat(path)
+            files.append([os.path.relpath(path, source), stat.st_mtime_ns, stat.st_size])
+    return sha1(json.dumps(files).encode()).hexdigest()
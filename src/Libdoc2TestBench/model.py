@@ -0,0 +1,146 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Compact model of the parts of a libdoc written to a project dump.
+
+A LibraryDoc holds the complete keyword and argument specs, sources and
+tags of a library. The writer only needs names, docs, parameter types and
+enum members, which build_library copies to slotted objects and tuples
+with interned names. The writer walks a library several times, e.g. for
+shared data types, a baseline and its pks, and works on the model, so the
+libdoc can be freed once the model is built.
+
+The model uses the attribute names of LibraryDoc and KeywordDoc, so it can
+be used wherever a loaded libdoc is expected. The keywords of a streamed
+spec file stay in the spec file and are copied while they are iterated.
+"""
+
+import sys
+from collections import namedtuple
+
+Parameter = namedtuple('Parameter', ['name', 'types_reprs'])
+Interaction = namedtuple('Interaction', ['name', 'doc', 'args'])
+# members is a tuple of (name, value) pairs, TypedDicts have no members.
+DataTypeModel = namedtuple('DataTypeModel', ['name', 'type', 'doc', 'members'])
+
+
+class DataTypeCatalog(tuple):
+    """The data types of a library in the order of the libdoc. ``enums`` are
+    the ones written as TestBench data types."""
+
+    __slots__ = ()
+
+    @property
+    def enums(self) -> tuple:
+        return tuple(data_type for data_type in self if data_type.type == 'Enum')
+
+
+class LibraryModel:
+    """A library or resource with its interactions and data types."""
+
+    __slots__ = (
+        'name',
+        'type',
+        'version',
+        'doc',
+        'doc_format',
+        'source',
+        'keywords',
+        'data_types',
+        '__weakref__',
+    )
+
+    def __init__(self, name, type, version, doc, doc_format, source, keywords, data_types):
+        self.name = name
+        self.type = type
+        self.version = version
+        self.doc = doc
+        self.doc_format = doc_format
+        self.source = source
+        self.keywords = keywords
+        self.data_types = data_types
+
+
+class _SpecInteractions:
+    # Sized and re-iterable like the keywords of the SpecLibraryDoc it copies.
+    __slots__ = ('_libdoc',)
+
+    def __init__(self, libdoc):
+        self._libdoc = libdoc
+
+    def __len__(self):
+        return len(self._libdoc.keywords)
+
+    def __iter__(self):
+        return map(build_interaction, self._libdoc.keywords)
+
+
+def build_libraries(libdocs):
+    """Returns the LibraryModels of a list of libdocs. A pipeline.LibdocStream
+    already yields models and is returned as it is."""
+    from .pipeline import LibdocStream
+
+    if isinstance(libdocs, LibdocStream):
+        return libdocs
+    return [build_library(libdoc) for libdoc in libdocs]
+
+
+def build_library(libdoc) -> LibraryModel:
+    """Returns the LibraryModel of a loaded libdoc, models are returned as they are."""
+    from .specreader import SpecLibraryDoc
+
+    if isinstance(libdoc, LibraryModel):
+        return libdoc
+    if isinstance(libdoc, SpecLibraryDoc):
+        keywords = _SpecInteractions(libdoc)
+    else:
+        keywords = tuple(map(build_interaction, libdoc.keywords))
+    # LibraryDoc.data_types sorts its data types every time it is iterated.
+    data_types = DataTypeCatalog(map(build_data_type, libdoc.data_types))
+    return LibraryModel(
+        _intern(libdoc.name),
+        libdoc.type,
+        libdoc.version,
+        libdoc.doc,
+        libdoc.doc_format,
+        libdoc.source,
+        keywords,
+        data_types,
+    )
+
+
+def build_interaction(keyword) -> Interaction:
+    return Interaction(
+        _intern(keyword.name),
+        keyword.doc,
+        tuple(
+            Parameter(_intern(arg.name), tuple(map(_intern, arg.types_reprs)))
+            for arg in keyword.args
+        ),
+    )
+
+
+def build_data_type(data_type) -> DataTypeModel:
+    members = getattr(data_type, 'members', None) or ()
+    return DataTypeModel(
+        _intern(data_type.name),
+        data_type.type,
+        data_type.doc,
+        tuple((_intern(member['name']), member['value']) for member in members),
+    )
+
+
+def _intern(value):
+    # Names and types repeat across keywords and libraries.
+    return sys.intern(value) if isinstance(value, str) else value
@@ -0,0 +1,157 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Streaming pipeline that keeps only one libdoc of an import list in memory.
+
+A LibdocStream replaces the list of libraries or resources given to the
+Libdoc2TestBenchWriter. It loads a libdoc when the writer gets to it and
+yields its compact model.LibraryModel. The libdoc is released before the
+next one is loaded. The writer walks the libraries more than once, e.g. to
+plan shared data types or to write the attachments of resources, so the
+stream keeps the models and every entry is loaded only once.
+"""
+
+import os
+from collections import deque
+
+
+class LibdocStream:
+    """A sized and re-iterable sequence of libdocs that are loaded one at a time.
+
+    The libdocs are yielded as model.LibraryModels, so a libdoc is released
+    before it is written. Every entry is loaded on the first iteration, later
+    iterations yield the kept models. ``load`` returns (libdoc, timings) for
+    an entry, ``on_load`` is called after every load with the libdoc and its
+    timings. With ``jobs`` greater than one, up to ``jobs`` entries are
+    loaded ahead in a process pool. ``loaded`` maps entries that are already
+    loaded to their (libdoc, timings), see split_entries."""
+
+    def __init__(self, entries, load, jobs: int = 1, on_load=None, loaded=None):
+        self.entries = list(entries)
+        self._load = load
+        self._jobs = jobs
+        self._on_load = on_load
+        self._loaded = loaded
+        self._models = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        if self._models is not None:
+            yield from self._models
+            return
+        from .model import build_library
+
+        models = []
+        for libdoc, timings in iter_loaded(self.entries, self._load, self._jobs, self._loaded):
+            if self._on_load:
+                self._on_load(libdoc, timings)
+            # The libdoc is released before the writer gets its model.
+            model = build_library(libdoc)
+            del libdoc
+            models.append(model)
+            yield model
+        self._models = models
+
+
+def iter_loaded(entries, load, jobs: int = 1, loaded=None):
+    """Yields ``load(entry)`` for all entries in order.
+
+    With ``jobs`` greater than one, at most ``jobs`` entries are loaded ahead
+    in a process pool, so the number of libdocs in memory stays bounded.
+    Entries in ``loaded`` are not loaded again, their result is taken from
+    it and released."""
+    loaded = {} if loaded is None else loaded
+    if jobs <= 1 or len(entries) <= 1:
+        for entry in entries:
+            yield loaded.pop(entry) if entry in loaded else load(entry)
+        return
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(entries))) as executor:
+        pending = deque()
+        for entry in entries:
+            if entry in loaded:
+                # from_portable keeps the libdoc as it is.
+                future = Future()
+                future.set_result(loaded.pop(entry))
+                pending.append(future)
+            else:
+                pending.append(executor.submit(load_portable, load, entry))
+            if len(pending) >= jobs:
+                libdoc, timings = pending.popleft().result()
+                yield from_portable(libdoc), timings
+        while pending:
+            libdoc, timings = pending.popleft().result()
+            yield from_portable(libdoc), timings
+
+
+def load_portable(load, entry):
+    """Runs ``load(entry)`` in a worker process and returns the libdoc
+    converted with to_portable and the timings."""
+    libdoc, timings = load(entry)
+    return to_portable(libdoc), timings
+
+
+def to_portable(libdoc):
+    """Returns a libdoc that can be passed to or from another process.
+
+    Libdocs of Python libraries reference the types of the library, which
+    cannot be unpickled in a process that did not import the library. They
+    are passed as libdoc spec dicts, spec files are cheap to pickle."""
+    from .specreader import SpecLibraryDoc
+
+    if isinstance(libdoc, SpecLibraryDoc):
+        return libdoc
+    return libdoc.to_dictionary()
+
+
+def from_portable(libdoc):
+    """Returns the libdoc of a result of to_portable."""
+    if isinstance(libdoc, dict):
+        from robot.libdocpkg.jsonbuilder import JsonDocBuilder
+
+        libdoc = JsonDocBuilder().build_from_dict(libdoc)
+    return libdoc
+
+
+def split_entries(entries, load):
+    """Splits import list entries into library and resource entries and
+    returns them and a dict of the entries that had to be loaded.
+
+    The type is determined the way LibraryDocumentation chooses its builder.
+    Only entries whose type cannot be told from the entry are loaded, the
+    dict maps them to the (libdoc, timings) ``load`` returned, so they can
+    be given to a LibdocStream instead of being loaded again."""
+    from robot.libdocpkg.builder import RESOURCE_EXTENSIONS
+
+    from .specreader import is_spec_file, read_spec_type
+
+    libraries, resources = [], []
+    loaded = {}
+    for entry in entries:
+        extension = os.path.splitext(entry)[1][1:].lower()
+        if os.path.isfile(entry) and extension in RESOURCE_EXTENSIONS:
+            libdoc_type = 'RESOURCE'
+        elif is_spec_file(entry):
+            libdoc_type = read_spec_type(entry)
+        elif extension in RESOURCE_EXTENSIONS:
+            # A library or a resource file in PYTHONPATH.
+            loaded[entry] = load(entry)
+            libdoc_type = loaded[entry][0].type
+        else:
+            libdoc_type = 'LIBRARY'
+        (resources if libdoc_type == 'RESOURCE' else libraries).append(entry)
+    return libraries, resources, loaded
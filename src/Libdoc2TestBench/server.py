@@ -0,0 +1,209 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Long-running server mode that keeps loaded libraries in memory.
+
+Started with ``Libdoc2TestBench serve``. Dump requests are POSTed as JSON
+to ``/dump`` over a local HTTP port or a Unix socket:
+
+    {"libraries": ["Browser", "keywords.resource"], "repository": "itba",
+     "libraryroot": "RF", "resourceroot": "Resource", "attachment": false,
+     "specdocformat": "HTML", "docformat": null, "name": null,
+     "libversion": null, "xml": false, "emitter": "xmlwriter",
+     "compression": "stored", "compresslevel": null, "shareddatatypes": false}
+
+The response body is the zip file, or the XML file if ``xml`` is set.
+``libraries`` are single libraries and resources, directories, glob
+patterns and import lists are not expanded and answered with status 400.
+A libdoc is loaded again when the files of its source changed. Docs are
+converted to HTML by one HtmlDocConverter, so the docs of unchanged
+libraries are only converted once.
+
+Any client can make the server import and run libraries from arbitrary
+paths, so it only listens on loopback addresses unless ``--allow-remote``
+is given.
+"""
+
+import argparse
+import io
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .libdoccache import LibdocStore
+
+DEFAULT_PORT = 8270
+
+
+class DumpRequestHandler(BaseHTTPRequestHandler):
+    """Handles POST /dump requests and answers with the project dump."""
+
+    server_version = 'Libdoc2TestBench'
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/dump':
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            dump_request = json.loads(self.rfile.read(length) or b'{}')
+            body, content_type = self.server.create_dump(dump_request)
+        except SystemExit as error:
+            # create_libdoc exits with a message if a library cannot be loaded.
+            self._send(400, str(error).encode('UTF-8'), 'text/plain; charset=UTF-8')
+        except Exception as error:
+            self._send(400, f"{type(error).__name__}: {error}".encode('UTF-8'), 'text/plain')
+        else:
+            self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address.
+        return self.client_address[0] if self.client_address else 'unix-socket'
+
+
+class _DumpServerMixin:
+    libdoc_store = None
+    doc_converter = None
+
+    def create_dump(self, dump_request: dict):
+        from . import read_import_list, write_dump
+        from .discovery import is_expandable
+
+        entries = dump_request.get('libraries', [])
+        if not isinstance(entries, list):
+            raise ValueError("'libraries' must be a list of libraries and resources.")
+        for entry in entries:
+            # Libdoc would document them as a resource without keywords.
+            if is_expandable(entry) or read_import_list(entry):
+                raise ValueError(
+                    f"'{entry}' is a directory, glob pattern or import list. "
+                    "List its libraries and resources instead."
+                )
+        libdocs = [
+            self.libdoc_store.get(
+                entry,
+                dump_request.get('name'),
+                dump_request.get('libversion'),
+                dump_request.get('docformat'),
+            )
+            for entry in entries
+        ]
+        buffer = io.BytesIO()
+        write_dump(
+            libdocs,
+            buffer,
+            xml=dump_request.get('xml', False),
+            repository=dump_request.get('repository'),
+            library_root=dump_request.get('libraryroot', 'RF'),
+            resource_root=dump_request.get('resourceroot', 'Resource'),
+            attachment=dump_request.get('attachment', False),
+            specdocformat=dump_request.get('specdocformat', 'HTML'),
+            emitter=dump_request.get('emitter', 'xmlwriter'),
+            compression=dump_request.get('compression', 'stored'),
+            compresslevel=dump_request.get('compresslevel'),
+            shared_datatypes=dump_request.get('shareddatatypes', False),
+            doc_converter=self.doc_converter,
+        )
+        if dump_request.get('xml'):
+            return buffer.getvalue(), 'application/xml'
+        return buffer.getvalue(), 'application/zip'
+
+
+class DumpHTTPServer(_DumpServerMixin, ThreadingHTTPServer):
+    pass
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+
+    class DumpUnixServer(
+        _DumpServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+    ):
+        daemon_threads = True
+
+
+def start_server(argv=None):
+    """Command line entry point of ``Libdoc2TestBench serve``."""
+    parser = argparse.ArgumentParser(
+        prog='Libdoc2TestBench serve',
+        description='Keeps imported libraries in memory and answers dump requests '
+        'POSTed as JSON to /dump.',
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='default = 127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'default = {DEFAULT_PORT}')
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of a TCP port.')
+    parser.add_argument(
+        '--allow-remote',
+        action='store_true',
+        help='Allows a --host that is not a loopback address. Any client that can reach '
+        'the server can make it import and run arbitrary libraries.',
+    )
+    args = parser.parse_args(argv)
+    if not args.socket and not is_loopback(args.host):
+        if not args.allow_remote:
+            parser.error(
+                f"argument --host: {args.host} is not a loopback address, any client could "
+                "make the server import arbitrary libraries. Use --allow-remote to listen on it."
+            )
+        print(f"Warning: any client that can reach {args.host} can import arbitrary libraries.")
+
+    if args.socket:
+        if os.path.lexists(args.socket):
+            # A socket left behind by a previous server is replaced, other files are kept.
+            if not stat.S_ISSOCK(os.lstat(args.socket).st_mode):
+                parser.error(f"argument --socket: {args.socket} exists and is not a socket.")
+            os.remove(args.socket)
+        server = DumpUnixServer(args.socket, DumpRequestHandler)
+        address = args.socket
+    else:
+        server = DumpHTTPServer((args.host, args.port), DumpRequestHandler)
+        address = f"http://{args.host}:{args.port}/dump"
+    server.libdoc_store = LibdocStore()
+    from .htmldocs import HtmlDocConverter
+
+    server.doc_converter = HtmlDocConverter()
+    print(f"Libdoc2TestBench serving on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def is_loopback(host: str) -> bool:
+    """Returns whether all addresses of ``host`` are loopback addresses."""
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except OSError:
+        return False
+    return bool(addresses) and all(
+        ipaddress.ip_address(address.split('%')[0]).is_loopback for address in addresses
+    )
@@ -0,0 +1,176 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Splitting of a project dump into several smaller project dumps (shards).
+
+A shard contains whole libraries and resources and is a complete project
+dump on its own. The primary keys of the shards are disjoint, so they can
+be imported in any order. A JSON manifest next to the shards lists the
+libraries, resources and primary key range of every shard. ``first_pk``
+and ``last_pk`` are the first and the last primary key used by a shard,
+the next shard starts at ``last_pk`` + 1. ``elements`` is the number of
+written interactions and data types:
+
+    {"shards": [
+        {"output": "project-dump-1.zip", "libraries": ["BuiltIn"],
+         "resources": [], "elements": 120, "first_pk": 231, "last_pk": 1290},
+        ...
+    ]}
+
+Parameters only refer to data types of their own shard, a data type of
+another shard is written as the generic data type (pk -1). With a baseline,
+every shard is compared to the baseline elements of its own libraries and
+resources, the elements removed from all of them are reported by the first
+shard.
+"""
+
+import json
+import os
+
+SHARD_BY = ['library']
+
+
+def count_elements(libdoc) -> int:
+    """Returns the number of interactions and data types of a libdoc."""
+    return len(libdoc.keywords) + len(libdoc.data_types.enums)
+
+
+def iter_shards(libraries, resources, max_elements: int = None):
+    """Yields (libraries, resources, element count) of the shards in the
+    order of the libdocs.
+
+    Without ``max_elements`` every libdoc is a shard of its own, otherwise
+    consecutive libdocs are grouped into shards of at most ``max_elements``
+    elements. A libdoc with more elements is a shard of its own. Only the
+    libdocs of the current shard are kept in memory."""
+    shard, shard_elements = ([], []), 0
+    for index, libdocs in enumerate((libraries, resources)):
+        for libdoc in libdocs:
+            elements = count_elements(libdoc)
+            if (shard[0] or shard[1]) and (
+                not max_elements or shard_elements + elements > max_elements
+            ):
+                yield shard[0], shard[1], shard_elements
+                shard, shard_elements = ([], []), 0
+            shard[index].append(libdoc)
+            shard_elements += elements
+    if shard[0] or shard[1]:
+        yield shard[0], shard[1], shard_elements
+
+
+def get_shard_path(outfile_path: str, number: int) -> str:
+    """Returns the path of a shard, e.g. project-dump-2.zip for project-dump.zip."""
+    base, extension = os.path.splitext(outfile_path)
+    return f"{base}-{number}{extension}"
+
+
+def get_manifest_path(outfile_path: str) -> str:
+    return f"{os.path.splitext(outfile_path)[0]}-shards.json"
+
+
+def split_baseline(baseline: dict, shards, repo_id=None, shared_datatypes=False) -> list:
+    """Returns the part of the baseline of every shard: the baseline elements
+    of its libraries and resources. The elements that are in no shard are
+    added to the first shard, so they are reported as removed only once."""
+    from .testbenchwriter import Libdoc2TestBenchWriter
+
+    writer = Libdoc2TestBenchWriter(shared_datatypes=shared_datatypes)
+    shard_uids = [
+        writer.get_element_uids(libraries, resources, repo_id) for libraries, resources, _ in shards
+    ]
+    all_uids = set().union(*shard_uids)
+    return [
+        {
+            uid: element
+            for uid, element in baseline.items()
+            if uid in uids or (number == 0 and uid not in all_uids)
+        }
+        for number, uids in enumerate(shard_uids)
+    ]
+
+
+def write_shards(
+    outfile_path,
+    libraries,
+    resources,
+    xml_flag,
+    writer_args,
+    compression='stored',
+    compresslevel=None,
+    max_elements: int = None,
+) -> list:
+    """Writes the shards of the libraries and resources and their manifest
+    and returns the paths of the shards.
+
+    ``writer_args`` are the arguments of write_project_dump after the
+    resources. The shards are named after ``outfile_path``, every shard
+    continues the primary keys after the last one of the previous shard."""
+    from . import confirm_overwrite, write_output
+    from .stats import RunStats
+
+    repo_id, baseline, stats, shared_datatypes = (
+        writer_args[0],
+        writer_args[4],
+        writer_args[6],
+        writer_args[9],
+    )
+    manifest_path = get_manifest_path(outfile_path)
+    confirm_overwrite(manifest_path)
+    shard_list = list(iter_shards(libraries, resources, max_elements))
+    baselines = [baseline] * len(shard_list)
+    if baseline is not None:
+        baselines = split_baseline(baseline, shard_list, repo_id, shared_datatypes)
+    last_pk = 230
+    shards = []
+    for number, ((shard_libraries, shard_resources, _), shard_baseline) in enumerate(
+        zip(shard_list, baselines), 1
+    ):
+        shard_path = get_shard_path(outfile_path, number)
+        confirm_overwrite(shard_path)
+        first_pk = last_pk
+        # Every shard counts its own written elements.
+        shard_stats = RunStats()
+        shard_writer_args = list(writer_args)
+        shard_writer_args[4], shard_writer_args[6] = shard_baseline, shard_stats
+        last_pk = write_output(
+            shard_path,
+            shard_libraries,
+            shard_resources,
+            xml_flag,
+            shard_writer_args,
+            compression,
+            compresslevel,
+            first_pk=first_pk,
+        )
+        if stats:
+            for name, phase in shard_stats.phases.items():
+                stats.add_phase(name, phase['seconds'])
+            for name, library in shard_stats.libraries.items():
+                stats.add_library(name, {'convert': library['convert']})
+            stats.add_elements(shard_stats.elements)
+        shards.append(
+            {
+                'output': os.path.basename(shard_path),
+                'libraries': [libdoc.name for libdoc in shard_libraries],
+                'resources': [libdoc.name for libdoc in shard_resources],
+                'elements': shard_stats.elements['interactions']
+                + shard_stats.elements['datatypes'],
+                'first_pk': first_pk + 1,
+                'last_pk': last_pk,
+            }
+        )
+    with open(manifest_path, 'w', encoding='UTF-8') as manifest_file:
+        json.dump({'shards': shards}, manifest_file, indent=2)
+    print(f"Shard manifest written to: \n{os.path.abspath(manifest_path)}")
+    return [get_shard_path(outfile_path, number) for number in range(1, len(shards) + 1)]
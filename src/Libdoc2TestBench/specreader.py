@@ -0,0 +1,326 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  This code contains derived code from Robot Framework Core Project
+#  under Apache 2.0 License.
+#  https://github.com/robotframework/robotframework
+
+"""Streaming reader for libdoc XML and JSON spec files.
+
+LibraryDocumentation builds the complete model of a spec file in memory.
+The SpecLibraryDoc returned by read_spec only holds the library meta data,
+inits and data types. Its keywords are parsed incrementally from the spec
+file every time they are iterated, so the memory used while writing does
+not grow with the size of the spec file.
+
+A spec file is read in two passes: data types are written before the
+keywords, but come after them in the spec file.
+"""
+
+import json
+import os
+from xml.etree.ElementTree import iterparse
+
+from robot.errors import DataError
+from robot.libdocpkg.builder import SPEC_EXTENSIONS
+from robot.libdocpkg.jsonbuilder import JsonDocBuilder
+from robot.libdocpkg.model import LibraryDoc
+from robot.libdocpkg.specbuilder import SpecDocBuilder
+
+JSON_CHUNK_SIZE = 1 << 16
+
+
+def is_spec_file(lib_or_res: str) -> bool:
+    extension = os.path.splitext(lib_or_res)[1][1:].lower()
+    return os.path.isfile(lib_or_res) and extension in SPEC_EXTENSIONS + ('json',)
+
+
+def read_spec(path: str, lib_name=None, lib_version=None, docformat=None):
+    """Returns a SpecLibraryDoc of the XML or JSON spec file at ``path``.
+
+    Name, version and doc format are overwritten like LibraryDocumentation does."""
+    if path.lower().endswith('.json'):
+        libdoc = _read_json_spec(path)
+    else:
+        libdoc = _read_xml_spec(path)
+    if lib_name:
+        libdoc.name = lib_name
+    if lib_version:
+        libdoc.version = lib_version
+    if docformat:
+        libdoc.doc_format = docformat
+    return libdoc
+
+
+def read_spec_type(path: str) -> str:
+    """Returns the type of the spec file, LIBRARY or RESOURCE, without reading
+    its keywords."""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='UTF-8') as json_file:
+            for key, value in _JsonObjectReader(json_file, lazy_keys=('inits', 'keywords')):
+                if key == 'type':
+                    return value.upper()
+                if key in ('inits', 'keywords'):
+                    for _ in value:
+                        pass
+        raise DataError(f"Invalid spec file '{path}'.")
+    for _, root in iterparse(path, events=('start',)):
+        _check_xml_spec(path, root)
+        return root.get('type').upper()
+
+
+class SpecLibraryDoc(LibraryDoc):
+    """A LibraryDoc whose keywords are read from its spec file on iteration.
+
+    The keywords are in the order of the spec file, which libdoc writes sorted."""
+
+    def __init__(self, spec_path: str, keyword_count: int, **metadata):
+        self.spec_path = spec_path
+        self.keyword_count = keyword_count
+        super().__init__(**metadata)
+
+    @property
+    def keywords(self):
+        return _SpecKeywords(self)
+
+    @keywords.setter
+    def keywords(self, keywords):
+        # LibraryDoc.__init__ initializes the keywords with an empty list.
+        if keywords:
+            raise TypeError('Keywords of a SpecLibraryDoc are read from its spec file.')
+
+    def iter_keywords(self):
+        if self.spec_path.lower().endswith('.json'):
+            keywords = _iter_json_keywords(self.spec_path)
+        else:
+            keywords = _iter_xml_keywords(self.spec_path)
+        for keyword in keywords:
+            keyword.parent = self
+            yield keyword
+
+
+class _SpecKeywords:
+    # Sized and re-iterable like the keyword list of a LibraryDoc.
+    def __init__(self, libdoc: SpecLibraryDoc):
+        self._libdoc = libdoc
+
+    def __len__(self):
+        return self._libdoc.keyword_count
+
+    def __iter__(self):
+        return self._libdoc.iter_keywords()
+
+
+def _read_xml_spec(path: str) -> SpecLibraryDoc:
+    builder = SpecDocBuilder()
+    metadata = {}
+    inits, data_types = [], []
+    keyword_count = 0
+    root = None
+    elements = []
+    for event, elem in iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            elements.append(elem)
+            if root is None:
+                root = elem
+                _check_xml_spec(path, root)
+            continue
+        elements.pop()
+        depth = len(elements)
+        if depth == 1 and elem.tag in ('version', 'doc'):
+            metadata[elem.tag] = elem.text or ''
+        elif depth == 2 and elem.tag == 'kw':
+            keyword_count += 1
+        elif depth == 2 and elem.tag == 'init':
+            inits.append(builder._create_keyword(elem))
+        elif depth == 3 and elem.tag == 'enum':
+            data_types.append(builder._create_enum_doc(elem))
+        elif depth == 3 and elem.tag == 'typeddict':
+            data_types.append(builder._create_typed_dict_doc(elem))
+        else:
+            continue
+        # Read elements are removed, so the tree never holds more than one of them.
+        del elements[-1][:]
+    libdoc = SpecLibraryDoc(
+        path,
+        keyword_count,
+        name=root.get('name'),
+        type=root.get('type').upper(),
+        version=metadata.get('version', ''),
+        doc=metadata.get('doc', ''),
+        scope=root.get('scope'),
+        doc_format=root.get('format', 'ROBOT'),
+        source=root.get('source'),
+        lineno=int(root.get('lineno', -1)),
+    )
+    libdoc.inits = inits
+    libdoc.data_types.update(data_types)
+    return libdoc
+
+
+def _check_xml_spec(path: str, root):
+    if root.tag != 'keywordspec':
+        raise DataError(f"Invalid spec file '{path}'.")
+    version = root.get('specversion')
+    if version != '3':
+        raise DataError(
+            f"Invalid spec file version '{version}'. "
+            "Robot Framework 4.0 and newer requires spec version 3."
+        )
+
+
+def _iter_xml_keywords(path: str):
+    builder = SpecDocBuilder()
+    depth = 0
+    for event, elem in iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 2:
+                parent = elem
+            continue
+        depth -= 1
+        if depth == 2 and elem.tag == 'kw':
+            yield builder._create_keyword(elem)
+            del parent[:]
+        elif depth == 1 and elem.tag == 'keywords':
+            # The data types after the keywords were read in the first pass.
+            return
+
+
+def _read_json_spec(path: str) -> SpecLibraryDoc:
+    spec = {}
+    keyword_count = 0
+    with open(path, encoding='UTF-8') as json_file:
+        for key, value in _JsonObjectReader(json_file, lazy_keys=('keywords',)):
+            if key == 'keywords':
+                keyword_count = sum(1 for _ in value)
+            else:
+                spec[key] = value
+    spec['keywords'] = []
+    # Builds the meta data, inits and data types like LibraryDocumentation.
+    full_libdoc = JsonDocBuilder().build_from_dict(spec)
+    libdoc = SpecLibraryDoc(
+        path,
+        keyword_count,
+        name=full_libdoc.name,
+        type=full_libdoc.type,
+        version=full_libdoc.version,
+        doc=full_libdoc._doc,
+        scope=full_libdoc.scope,
+        doc_format=full_libdoc.doc_format,
+        source=full_libdoc.source,
+        lineno=full_libdoc.lineno,
+    )
+    libdoc.inits = full_libdoc.inits
+    libdoc.data_types = full_libdoc.data_types
+    return libdoc
+
+
+def _iter_json_keywords(path: str):
+    builder = JsonDocBuilder()
+    with open(path, encoding='UTF-8') as json_file:
+        for key, value in _JsonObjectReader(json_file, lazy_keys=('keywords',)):
+            if key == 'keywords':
+                for keyword in value:
+                    yield builder._create_keyword(keyword)
+                return
+
+
+class _JsonObjectReader:
+    """Reads the members of the top level JSON object of a file one by one.
+
+    The values of ``lazy_keys`` are arrays, which are returned as iterators
+    over their items. Such an iterator has to be consumed before the next
+    member is read."""
+
+    def __init__(self, file, lazy_keys=()):
+        self._file = file
+        self._lazy_keys = lazy_keys
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if key in self._lazy_keys and self._peek() == '[':
+                yield key, self._iter_array()
+            else:
+                yield key, self._decode()
+            if self._next_separator('}'):
+                return
+
+    def _iter_array(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode()
+            if self._next_separator(']'):
+                return
+
+    def _next_separator(self, end: str) -> bool:
+        char = self._peek()
+        self._pos += 1
+        if char == end:
+            return True
+        if char != ',':
+            raise DataError(f"Invalid JSON spec file: expected ',' or '{end}', got {char!r}.")
+        return False
+
+    def _expect(self, expected: str):
+        char = self._peek()
+        if char != expected:
+            raise DataError(f"Invalid JSON spec file: expected '{expected}', got {char!r}.")
+        self._pos += 1
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._read():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def _decode(self):
+        self._peek()
+        chunk_size = JSON_CHUNK_SIZE
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # The value is larger than the buffer, read bigger chunks.
+            self._read(chunk_size)
+            chunk_size *= 2
+
+    def _read(self, chunk_size: int = JSON_CHUNK_SIZE) -> bool:
+        chunk = self._file.read(chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed part of the buffer.
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
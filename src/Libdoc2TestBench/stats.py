@@ -0,0 +1,123 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Per-phase and per-library instrumentation of a project dump run.
+
+Memory is only reported as the peak RSS of the whole run. The peak RSS of a
+process only grows, so it cannot be attributed to a phase or library, and
+tracing allocations per phase would slow down the phases it measures.
+"""
+
+import json
+import sys
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PHASES = ['load', 'convert', 'write', 'zip']
+ELEMENTS = ['interactions', 'parameters', 'generic_parameters', 'datatypes', 'representatives']
+
+
+def get_peak_rss():
+    """Returns the peak resident set size of this process and its children in
+    bytes or None if it cannot be determined on this platform."""
+    if resource is None:
+        return None
+    peak_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else.
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class RunStats:
+    """A class to collect wall times, written bytes and emitted elements of a
+    project dump run and its peak RSS."""
+
+    def __init__(self):
+        self.phases = {}
+        self.libraries = {}
+        self.elements = dict.fromkeys(ELEMENTS, 0)
+        self.bytes_written = {}
+
+    def add_phase(self, name: str, seconds: float):
+        phase = self.phases.setdefault(name, {'seconds': 0.0})
+        phase['seconds'] += seconds
+
+    def add_library(self, name: str, timings: dict):
+        library = self.libraries.setdefault(name, {'load': 0.0, 'convert': 0.0})
+        for phase, seconds in timings.items():
+            library[phase] += seconds
+
+    def phase_seconds(self, name: str) -> float:
+        return self.phases.get(name, {}).get('seconds', 0.0)
+
+    def add_elements(self, counts: dict):
+        for element, count in counts.items():
+            self.elements[element] = self.elements.get(element, 0) + count
+
+    def to_dict(self) -> dict:
+        return {
+            'phases': self.phases,
+            'libraries': self.libraries,
+            'elements': self.elements,
+            'bytes_written': self.bytes_written,
+            'peak_rss_bytes': get_peak_rss(),
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='UTF-8') as json_file:
+            json.dump(self.to_dict(), json_file, indent=2)
+
+    def print_table(self):
+        print(f"{'Phase':<30}{'Seconds':>12}")
+        for name in sorted(self.phases, key=_phase_order):
+            print(f"{name:<30}{self.phases[name]['seconds']:>12.3f}")
+        print()
+        print(f"{'Library':<30}{'Load s':>12}{'Convert s':>14}")
+        for name, library in self.libraries.items():
+            print(f"{name:<30}{library['load']:>12.3f}{library['convert']:>14.3f}")
+        print()
+        for element, count in self.elements.items():
+            print(f"{element:<30}{count:>12}")
+        for output, size in self.bytes_written.items():
+            print(f"{output + ' bytes':<30}{size:>12}")
+        print(f"{'peak RSS MB':<30}{_megabytes(get_peak_rss()):>12}")
+
+
+def run_profiled(profile_path: str, func, *args, **kwargs):
+    """Runs ``func`` with cProfile. The statistics are written to ``profile_path``
+    or printed sorted by cumulative time if it is ``-``."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if profile_path == '-':
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+        else:
+            profiler.dump_stats(profile_path)
+
+
+def _phase_order(name):
+    return PHASES.index(name) if name in PHASES else len(PHASES)
+
+
+def _megabytes(size):
+    return '-' if size is None else f"{size / (1024 * 1024):.1f}"
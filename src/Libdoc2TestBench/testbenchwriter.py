@@ -16,13 +16,19 @@
 #  under Apache 2.0 License.
 #  https://github.com/robotframework/robotframework
 
-import enum, os
+import enum, io, os
+from collections import deque
 from datetime import datetime
 from hashlib import sha1
 from pathlib import Path
 from typing import List
 
-from robot.utils import XmlWriter
+from robot.utils import NullMarkupWriter, XmlWriter
+
+from .baseline import DeltaSummary, content_hash
+from .htmldocs import HtmlDocConverter
+from .model import build_libraries
+from .xmlemitter import TemplateXmlWriter
 
 
 class ElementTypes(enum.Enum):
@@ -51,89 +57,209 @@ class PKGenerator:
     def __init__(self, first_pk: int = 230):
         self.pk_counter = first_pk
 
-    def get_pk(self) -> str:
+    def next_pk(self) -> int:
         self.pk_counter += 1
-        return str(self.pk_counter)
+        return self.pk_counter
 
+    def get_pk(self) -> str:
+        return str(self.next_pk())
 
-class Element:
-    """A class to represent imbus TestBench related test elements."""
 
-    # Remember all created element objects and their associated pk.
-    all_elements = {}
+class WriterContext:
+    """A class to hold the state of a single Libdoc2TestBenchWriter.write run.
 
-    def __init__(self, pk_generator: PKGenerator, element, parent_element=None):
-        self.element = element
-        self.pk = pk_generator.get_pk()
-        self.parent = parent_element
+    Every run gets its own context, so nothing is shared between runs and
+    the memory of a run is released together with its context."""
 
-        if element.doc:
-            self.html_desc = f"<html>{element.doc}</html>"
+    def __init__(
+        self,
+        repo_id: str = None,
+        first_pk: int = 230,
+        convert_docs: bool = False,
+        doc_converter: HtmlDocConverter = None,
+    ):
+        self.pk_generator = PKGenerator(first_pk)
 
-        self._set_name_and_register_in_all_elements()
+        # Converts docs to HTML when they are written, shared by all libraries.
+        # A given converter may also be shared with other runs.
+        self.doc_converter = None
+        if convert_docs:
+            self.doc_converter = doc_converter or HtmlDocConverter()
 
-    def _set_name_and_register_in_all_elements(self):
-        # Each element's name is build via its hierarchy.
-        # If it has a parent, the parent's name will be the prefix.
-        if self.parent:
-            self.name = self.parent.name + '.' + self.element.name
-        else:
-            self.name = self.element.name
+        # Type name -> pk of the data type parameters of that type refer to,
+        # filled with all data types before the test elements are written.
+        self.type_index = TypeIndex()
 
-        # Register element for later access to element's unique pk
-        Element.all_elements[self.name] = self.pk
+        # Libdoc name -> pk of the reference of attached resource files.
+        self.attachment_reference_pk = {}
 
-    def get_name(self) -> str:
-        # Returns the element's name without the parent-prefix.
-        return self.name.split('.', 1)[-1]
+        self.created_time = f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} +0000"
 
+        # Attributes used in the header of the xml-file
+        self.xml_attributes = dict(Libdoc2TestBenchWriter.xml_attributes)
+        if repo_id:
+            self.xml_attributes['repository'] = repo_id
 
-class DataType(Element):
-    """A class used to gather information for imbus TestBench
-    data types from the associated Robot Framework data type.
-    Each Robot Framework data type is converted into one
-    "members" equivalence class and each valid value is one
-    representative in the imbus TestBench."""
+        # Values used to fill testobject version fields.
+        self.testobjectversion_tags = dict(Libdoc2TestBenchWriter.testobjectversion_tags)
+        self.testobjectversion_tags['createdTime'] = self.created_time
 
-    def __init__(self, pk_generator: PKGenerator, data_type, parent_element=None):
-        super().__init__(pk_generator, data_type)
-        self.type = data_type.type
+        # (pk before, last pk) of every library subdivision in the order they
+        # are written, recorded by the dry run that fills the type index.
+        self.library_pks = deque()
 
-        # Holds all enum values, typed_dics are considered to be
-        # generic for imbus TestBench purposes.
-        self.representatives = {}
+        # UIDs of the elements to write, None writes all elements.
+        self.export_uids = None
+        self.export_libraries = set()
+        self.delta_summary = None
 
-        if self.type == 'Enum':
-            self.members = data_type.members
-            for member in self.members:
-                key = f"{self.name}.{member['name']}"
-                value = f"{self.name}.{member['value']}"
-                self.representatives[key] = value
+        # Fingerprint -> DataType of the data types in the shared subdivision.
+        self.shared_data_types = {}
 
-                # Register in all_elements dic for later access of pks.
-                Element.all_elements[key] = pk_generator.get_pk()
+        # Number of written elements per element kind.
+        self.element_counts = {
+            'interactions': 0,
+            'parameters': 0,
+            'generic_parameters': 0,
+            'datatypes': 0,
+            'representatives': 0,
+        }
+
+
+class DataType:
+    """A class used to gather information for imbus TestBench
+    data types from the associated Robot Framework data type.
+    Each Robot Framework enum is converted into one "members"
+    equivalence class and each member is one representative in
+    the imbus TestBench. TypedDicts are considered to be generic
+    for imbus TestBench purposes."""
+
+    __slots__ = ('pk', 'name', 'html_desc', 'representatives')
+
+    def __init__(self, context: WriterContext, data_type, doc=None):
+        # data_type is a model.DataTypeModel. The pks are ints, they are
+        # formatted when written.
+        self.pk = context.pk_generator.next_pk()
+        self.name = data_type.name
+
+        # doc overwrites the data type's doc, e.g. with its HTML conversion.
+        doc = data_type.doc if doc is None else doc
+        self.html_desc = f"<html>{doc}</html>" if doc else ''
+
+        # (member name, pk) of every representative.
+        self.representatives = tuple(
+            (name, context.pk_generator.next_pk()) for name, _ in data_type.members
+        )
+
+
+class TypeIndex:
+    """An index of the data types of a run used to resolve parameter types.
+
+    The index is filled with the data types of all libraries before the
+    first parameter is written. Type names are normalized like UIDs and
+    qualified names are indexed by their last part. A parameter type is
+    resolved by the first member of its union (``Union[A, B]``,
+    ``Optional[A]``, ``A | B``) that is in the index, a data type of the
+    library of the parameter before the first one of that name in the run.
+    TypedDicts are indexed as generic, so they hide enums of the same name
+    in other libraries. Other types, e.g. containers, are generic."""
+
+    def __init__(self):
+        # Normalized name -> value of the first data type of that name.
+        self._types = {}
+        # Library name -> normalized name -> value of its data types.
+        self._library_types = {}
+        # (library name, tuple of type reprs) -> resolved value.
+        self._resolved = {}
+
+    def add(self, name: str, value, library: str = None):
+        """Adds a data type, ``value`` None marks it as generic. Adding a
+        data type again does not change the index."""
+        name = normalize_type_name(name)
+        types = [self._types]
+        if library is not None:
+            types.append(self._library_types.setdefault(library, {}))
+        for index in types:
+            if name not in index:
+                index[name] = value
+                self._resolved.clear()
+
+    def resolve(self, types_reprs, library: str = None, default=None):
+        key = (library, tuple(types_reprs))
+        if key not in self._resolved:
+            library_types = self._library_types.get(library, {})
+            value = next(
+                (
+                    library_types[name] if name in library_types else self._types[name]
+                    for type_repr in key[1]
+                    for name in map(normalize_type_name, split_union(type_repr))
+                    if name in library_types or name in self._types
+                ),
+                None,
+            )
+            self._resolved[key] = default if value is None else value
+        return self._resolved[key]
+
+
+def split_union(type_repr: str) -> list:
+    """Returns the members of a union type repr or the type repr itself."""
+    type_repr = type_repr.strip()
+    for prefix in ('Union[', 'Optional[', 'typing.Union[', 'typing.Optional['):
+        if type_repr.startswith(prefix) and type_repr.endswith(']'):
+            members = _split_top_level(type_repr[len(prefix) : -1], ',')
+            return [name for member in members for name in split_union(member)]
+    members = _split_top_level(type_repr, '|')
+    if len(members) > 1:
+        return [name for member in members for name in split_union(member)]
+    return [type_repr]
+
+
+def normalize_type_name(name: str) -> str:
+    name = name.strip().strip('\'"')
+    if '[' not in name:
+        # common.Color -> Color
+        name = name.rsplit('.', 1)[-1]
+    return name.replace('_', '').replace(' ', '').lower()
+
+
+def _split_top_level(text: str, separator: str) -> list:
+    # Splits at separators that are not nested in brackets.
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts]
+
+
+def data_type_fingerprint(data_type) -> tuple:
+    """Returns the name and members of an enum, which identify a shared data type."""
+    return data_type.name, data_type.members
 
 
 class Libdoc2TestBenchWriter:
     """A class to generate imbus TestBench readable xml-files from Robot Framework
     libraries.
 
+    The class attributes are read-only defaults. All state of a run lives in
+    the WriterContext created by write(), so separate writer instances can
+    write concurrently.
+
     Methods
     -------
     write(libdoc, outfile)
         Writes the content of the libdoc in an imbus TestBench importable xml-format."""
 
-    # Created when first evoked by self.write
-    pk_generator = None
-
     # Values used to fill project view fields.
     testobject_state = ProjectStates.active.value
     testobject_desc = "Robot Framework Import"
-    created_time = f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} +0000"
-    libdoc_name = None  # set-up in write() method.
-    attachment_reference_pk = {}  # Needed for resource files - holds exactly one pk
 
-    # Attributes used in the header of the xml-file
+    # Default attributes used in the header of the xml-file
     xml_attributes = {'version': "2.6.1", 'build-number': "201215/dcee", 'repository': "iTB_RF"}
 
     # Values used to fill imbus TestBench project settings.
@@ -149,14 +275,14 @@ class Libdoc2TestBenchWriter:
         'variants-management-enabled': 'false',
     }
 
-    # Values used to fill testobject version fields.
+    # Default values used to fill testobject version fields.
     testobjectversion_tags = {
         'pk': None,  # set-up in write() method
         'id': 'RF Import',
         'startdate': '',
         'enddate': '',
         'status': testobject_state,
-        'createdTime': created_time,
+        'createdTime': None,  # set-up in write() method
         'description': 'Robot Framework Import',
         'html-description': '',
         'testingIntelligence': 'false',
@@ -169,9 +295,31 @@ class Libdoc2TestBenchWriter:
         'testthemes': '',
     }
 
-    def __init__(self, project_name='RF Import', testobject_name='RF Import'):
+    def __init__(
+        self,
+        project_name='RF Import',
+        testobject_name='RF Import',
+        emitter='xmlwriter',
+        convert_docs=False,
+        doc_converter=None,
+        shared_datatypes=False,
+        jobs=1,
+    ):
         self.project_name = project_name
         self.testobject_name = testobject_name
+        # 'xmlwriter' uses robot.utils.XmlWriter, 'template' the TemplateXmlWriter.
+        self.emitter = emitter
+        # If set, docs are converted to HTML when written instead of
+        # requiring libdocs converted by LibraryDoc.convert_docs_to_html().
+        self.convert_docs = convert_docs
+        # Optional HtmlDocConverter shared between writers, e.g. in batch mode.
+        self.doc_converter = doc_converter
+        # If set, identical enums of all libraries are written once to a
+        # shared _Datatypes subdivision.
+        self.shared_datatypes = shared_datatypes
+        # Number of processes rendering library subdivisions.
+        self.jobs = jobs
+        self.context = None  # set-up in write() method
 
     def write(
         self,
@@ -182,58 +330,293 @@ class Libdoc2TestBenchWriter:
         library_root: str,
         resource_root: str,
         attachment: bool,
+        baseline: dict = None,
+        first_pk: int = 230,
     ):
         """Writes an imbus TestBench readable xml-file.
 
         Parameters
         ----------
         libraries : LibraryDocumentation lists
-            List of robot.libdocpkg.LibraryDocumentation file.
+            List of robot.libdocpkg.LibraryDocumentation file, of
+            model.LibraryModel or a pipeline.LibdocStream, which loads
+            them one at a time.
         resources : LibraryDocumentation lists
-            List of robot.libdocpkg.LibraryDocumentation file.
+            List of robot.libdocpkg.LibraryDocumentation file, of
+            model.LibraryModel or a pipeline.LibdocStream, which loads
+            them one at a time.
         outfile: IO
             IO stream to write files to.
         repo_id: String
             Overwrite XML-attribute in the header
+        baseline: dict
+            UID -> (name, content hash) of a previous dump as returned by
+            baseline.read_baseline. If set, only new or changed interactions
+            and data types are written.
+        first_pk: int
+            The primary keys of the written elements are greater than first_pk.
+
+        Returns the last issued primary key as an int. Libraries and
+        resources with the same subdivision UID raise a ValueError.
         """
 
-        # If --repository is set, overwrite xml_attribute for it.
-        if repo_id:
-            self.xml_attributes['repository'] = repo_id
+        # The libdocs are walked several times, so they are converted once
+        # to compact models.
+        libraries, resources = build_libraries(libraries), build_libraries(resources)
+        self._check_unique_names(libraries, resources)
+
+        # If --repository is set, it overwrites the xml_attribute for it.
+        self.context = WriterContext(
+            repo_id,
+            first_pk,
+            convert_docs=self.convert_docs,
+            doc_converter=self.doc_converter,
+        )
+
+        self.context.testobjectversion_tags["pk"] = self.context.pk_generator.get_pk()
+
+        if self.shared_datatypes:
+            self._plan_shared_data_types(libraries, resources)
 
-        self.pk_generator = PKGenerator()
+        if baseline is not None:
+            libraries, resources = list(libraries), list(resources)
+            self._plan_delta(libraries + resources, baseline)
+            export_libraries = self.context.export_libraries
+            libraries = [libdoc for libdoc in libraries if libdoc.name in export_libraries]
+            resources = [libdoc for libdoc in resources if libdoc.name in export_libraries]
 
-        self.testobjectversion_tags["pk"] = self.pk_generator.get_pk()
+        # Parameters may refer to data types of libraries that are written later.
+        self._index_data_types(libraries, resources, library_root, resource_root, attachment)
 
-        writer = XmlWriter(outfile, usage='Libdoc spec')
+        if self.emitter == 'template':
+            writer = TemplateXmlWriter(outfile, usage='Libdoc spec')
+        else:
+            writer = XmlWriter(outfile, usage='Libdoc spec')
         self._write_start(writer)
+        self._write_content(writer, libraries, resources, library_root, resource_root, attachment)
+        self._write_end(writer)
+
+        # Return last issued primary key, the next free one is one higher.
+        return self.context.pk_generator.pk_counter
+
+    def get_element_uids(self, libraries, resources, repo_id: str = None) -> set:
+        """Returns the UIDs of the interactions and data types that write()
+        would write for the libraries and resources without a baseline."""
+        libraries, resources = build_libraries(libraries), build_libraries(resources)
+        self.context = WriterContext(repo_id)
+        if self.shared_datatypes:
+            self._plan_shared_data_types(libraries, resources)
+        uids = set()
+        for libdoc in libraries + resources:
+            for data_type in libdoc.data_types.enums:
+                uids.add(self._get_datatype_uid(libdoc, data_type))
+            for keyword in libdoc.keywords:
+                uids.add(self._generate_UID('IA', keyword.name, libdoc.name))
+        return uids
+
+    def _check_unique_names(self, libraries, resources):
+        # The UIDs and attachment files of a library are derived from its name.
+        # get_entries already checks the entries before they are loaded, this
+        # catches names only known after loading, e.g. of spec files.
+        sources = {}
+        for libdoc in list(libraries) + list(resources):
+            # Normalized like in _generate_UID.
+            key = libdoc.name.replace('_', '').replace(' ', '').lower()
+            if key in sources:
+                raise ValueError(
+                    f"Libraries and resources must have different names, '{libdoc.name}' "
+                    f"of '{libdoc.source}' gets the same UID as '{sources[key]}'."
+                )
+            sources[key] = libdoc.source
+
+    def _write_content(self, writer, libraries, resources, library_root, resource_root, attachment):
+        # Writes the references and the test elements, which issue all pks.
         if attachment:
             self._write_attachments(resources, writer)
         self._start_testobjectversion(writer)
+        if self.context.shared_data_types:
+            self._write_shared_data_types(writer)
         if libraries:
             self._start_root_subdivision(writer, library_root, 'Robot Framework Libraries')
-            for libdoc in libraries:
-                self._start_library_subdivision(libdoc, writer)
-                self._write_data_types(libdoc, writer)
-                self._write_interactions(libdoc, writer)
-                self._end_library_subdivision(writer)
+            self._write_libraries(libraries, writer)
             self._end_root_subdivision(writer)
         if resources:
             self._start_root_subdivision(writer, resource_root, 'Robot Framework Resource Files')
-            for libdoc in resources:
-                self._start_library_subdivision(libdoc, writer)
-                self._write_data_types(libdoc, writer)
-                self._write_interactions(libdoc, writer, attachment)
-                self._end_library_subdivision(writer)
+            self._write_libraries(resources, writer, attachment)
             self._end_root_subdivision(writer)
         self._end_testobjectversion(writer)
-        self._write_end(writer)
 
-        # Return last issued primary key.
-        return self.pk_generator.get_pk()
+    def _index_data_types(self, libraries, resources, library_root, resource_root, attachment):
+        # Writes the content without output, which adds every data type and
+        # its pk to the type index and records the pks of every library.
+        # Writing the content again issues the same pks, so the pks are reset
+        # afterwards. Docs are not converted.
+        context = self.context
+        first_pk = context.pk_generator.pk_counter
+        element_counts, doc_converter = context.element_counts, context.doc_converter
+        context.element_counts = dict.fromkeys(element_counts, 0)
+        context.doc_converter = None
+        try:
+            self._write_content(
+                NullMarkupWriter(), libraries, resources, library_root, resource_root, attachment
+            )
+        finally:
+            context.pk_generator.pk_counter = first_pk
+            context.element_counts, context.doc_converter = element_counts, doc_converter
+
+    def _write_libraries(self, libdocs, writer, attachment=False):
+        if isinstance(writer, NullMarkupWriter):
+            # The dry run of _index_data_types.
+            pk_generator = self.context.pk_generator
+            for libdoc in libdocs:
+                first_pk = pk_generator.pk_counter
+                self._write_library(libdoc, writer, attachment)
+                self.context.library_pks.append((first_pk, pk_generator.pk_counter))
+            return
+        if self.jobs > 1:
+            return self._render_libraries(libdocs, writer, attachment)
+        for libdoc in libdocs:
+            self._write_library(libdoc, writer, attachment)
+
+    def _write_library(self, libdoc, writer, attachment=False):
+        self._start_library_subdivision(libdoc, writer)
+        self._write_data_types(libdoc, writer)
+        self._write_interactions(libdoc, writer, attachment)
+        self._end_library_subdivision(writer)
+
+    def _render_libraries(self, libdocs, writer, attachment=False):
+        # Every library gets the pks it used in the dry run, which are the
+        # pks it uses when written sequentially, so the output is the same
+        # for any number of jobs. The library subdivisions are rendered in a
+        # process pool and written in order. Every worker converts docs with
+        # one converter, which starts with the docs converted so far.
+        from concurrent.futures import ProcessPoolExecutor
+
+        options = (self.emitter, self.convert_docs, self.shared_datatypes)
+        doc_converter = self.context.doc_converter
+        memo = doc_converter.get_memo() if doc_converter else None
+        with ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=init_render_worker, initargs=(memo,)
+        ) as executor:
+            pending = deque()
+            for libdoc in libdocs:
+                first_pk, last_pk = self.context.library_pks.popleft()
+                state = {
+                    'xml_attributes': self.context.xml_attributes,
+                    'export_uids': self.context.export_uids,
+                    'attachment_reference_pk': self.context.attachment_reference_pk,
+                    'shared_data_types': self.context.shared_data_types,
+                    'type_index': self.context.type_index,
+                }
+                rendering = executor.submit(
+                    render_library, options, state, libdoc, first_pk, attachment
+                )
+                self.context.pk_generator.pk_counter = last_pk
+                pending.append((rendering, last_pk))
+                # Only a few rendered libraries are kept in memory.
+                while len(pending) > 2 * self.jobs:
+                    self._write_rendered_library(writer, *pending.popleft())
+            while pending:
+                self._write_rendered_library(writer, *pending.popleft())
+
+    def _write_rendered_library(self, writer, rendering, last_pk):
+        fragment, rendered_last_pk, element_counts, convert_timings, docs = rendering.result()
+        if rendered_last_pk != last_pk:
+            raise RuntimeError(
+                f"Rendered library used pks up to {rendered_last_pk}, reserved were {last_pk}."
+            )
+        writer.content(fragment, escape=False)
+        for element, count in element_counts.items():
+            self.context.element_counts[element] += count
+        if self.context.doc_converter:
+            self.context.doc_converter.add_timings(convert_timings)
+            # Later libraries and runs with this converter reuse them.
+            self.context.doc_converter.update_memo(docs)
+
+    def _plan_shared_data_types(self, libraries, resources):
+        # The first enum with a name is shared by all libraries with an
+        # identical enum. Enums with the same name but other members stay in
+        # the _Datatypes subdivision of their library.
+        shared_names = set()
+        for libdocs in (libraries, resources):
+            for libdoc in libdocs:
+                for data_type in libdoc.data_types.enums:
+                    fingerprint = data_type_fingerprint(data_type)
+                    if data_type.name in shared_names:
+                        continue
+                    shared_names.add(data_type.name)
+                    self.context.shared_data_types[fingerprint] = DataType(
+                        self.context, data_type, doc=self._type_doc(libdoc, data_type)
+                    )
+
+    def _plan_delta(self, libdocs, baseline):
+        # Hash all elements the same way baseline.read_baseline does and
+        # keep the ones that are new or differ from the baseline.
+        current = {}
+        # Resolves parameter types like the type index of the writer.
+        datatype_uids = TypeIndex()
+        for libdoc in libdocs:
+            for data_type in libdoc.data_types:
+                uid = None
+                if data_type.type == 'Enum':
+                    uid = self._get_datatype_uid(libdoc, data_type)
+                datatype_uids.add(data_type.name, uid, libdoc.name)
+        interaction_refs = {}
+        library_uids = {}
+        for libdoc in libdocs:
+            uids = library_uids[libdoc.name] = []
+            for data_type in libdoc.data_types.enums:
+                uid = self._get_datatype_uid(libdoc, data_type)
+                if uid in current:
+                    # A shared data type is part of the dump, not of a library.
+                    continue
+                html_desc = (
+                    f"<html>{self._type_doc(libdoc, data_type)}</html>" if data_type.doc else ''
+                )
+                representatives = [name for name, _ in data_type.members]
+                current[uid] = (
+                    data_type.name,
+                    content_hash(data_type.name, html_desc, representatives),
+                )
+                if not self._is_shared(data_type):
+                    uids.append(uid)
+            for keyword in libdoc.keywords:
+                uid = self._generate_UID('IA', keyword.name, libdoc.name)
+                parameters = []
+                for arg in keyword.args:
+                    parameters.append(
+                        (arg.name, datatype_uids.resolve(arg.types_reprs, libdoc.name, ''))
+                    )
+                interaction_refs[uid] = [typ_uid for _, typ_uid in parameters if typ_uid]
+                current[uid] = (
+                    keyword.name,
+                    content_hash(
+                        keyword.name,
+                        f"<html>{self._keyword_doc(libdoc, keyword)}</html>",
+                        parameters,
+                    ),
+                )
+                uids.append(uid)
+
+        self.context.delta_summary = DeltaSummary()
+        self.context.delta_summary.compare(baseline, current)
+        export_uids = self.context.export_uids = {
+            uid
+            for uid, (_, element_hash) in current.items()
+            if uid not in baseline or baseline[uid][1] != element_hash
+        }
+        # Data types referenced by written interactions have to be part of the dump.
+        for uid in list(export_uids):
+            export_uids.update(interaction_refs.get(uid, []))
+        self.context.export_libraries = {
+            name for name, uids in library_uids.items() if export_uids.intersection(uids)
+        }
+
+    def _is_exported(self, uid) -> bool:
+        return self.context.export_uids is None or uid in self.context.export_uids
 
     def _write_start(self, writer):
-        writer.start('project-dump', self.xml_attributes)
+        writer.start('project-dump', self.context.xml_attributes)
         writer.start('details')
         writer.element('name', self.project_name)
         writer.element('id', '')
@@ -253,7 +636,7 @@ class Libdoc2TestBenchWriter:
         writer.element('description', self.testobject_desc)
         writer.element('html-description', '')
         writer.element('testingIntelligence', 'false')
-        writer.element('createdTime', self.created_time)
+        writer.element('createdTime', self.context.created_time)
         writer.start('settings')
         for key, value in self.project_settings.items():
             writer.element(key, value)
@@ -271,18 +654,19 @@ class Libdoc2TestBenchWriter:
 
     def _write_attachments(self, resources, writer):
         writer.start('references')
+        # A LibdocStream loads the resources here and keeps their models for writing.
         for libdoc in resources:
             writer.start('reference')
             # set-up needed reference
-            self.attachment_reference_pk[libdoc.name] = self.pk_generator.get_pk()
-            writer.element('pk', self.attachment_reference_pk[libdoc.name])
+            self.context.attachment_reference_pk[libdoc.name] = self.context.pk_generator.get_pk()
+            writer.element('pk', self.context.attachment_reference_pk[libdoc.name])
             writer.element('attachment-path', os.path.split(str(Path(libdoc.source).resolve()))[0])
             writer.element('filename', os.path.split(str(Path(libdoc.source).resolve()))[1])
             writer.element('type', '2')
             writer.element('version', '')
-            writer.element('attachment-pk', self.pk_generator.get_pk())
+            writer.element('attachment-pk', self.context.pk_generator.get_pk())
             writer.element('attachment-filename', libdoc.name + '.resource')
-            writer.element('attachment-file-pk', self.pk_generator.get_pk())
+            writer.element('attachment-file-pk', self.context.pk_generator.get_pk())
             writer.element('old-versions', '')
             writer.end('reference')
         writer.end('references')
@@ -290,14 +674,14 @@ class Libdoc2TestBenchWriter:
     def _start_testobjectversion(self, writer):
         writer.start('testobjectversions')
         writer.start('testobjectversion')
-        for key, value in self.testobjectversion_tags.items():
+        for key, value in self.context.testobjectversion_tags.items():
             writer.element(key, value)
         writer.start('test-elements')
 
     def _start_root_subdivision(self, writer, name, description):
         # Start RF/Resource subdivison
         writer.start('element', {'type': ElementTypes.subdivision.value})
-        writer.element('pk', self.pk_generator.get_pk())
+        writer.element('pk', self.context.pk_generator.get_pk())
         writer.element('name', name)
         writer.element('uid', self._generate_UID('SD', name))
         writer.element('locker', '')
@@ -309,69 +693,154 @@ class Libdoc2TestBenchWriter:
 
     def _start_library_subdivision(self, libdoc, writer):
         writer.start('element', {'type': ElementTypes.subdivision.value})
-        writer.element('pk', self.pk_generator.get_pk())
+        writer.element('pk', self.context.pk_generator.get_pk())
         writer.element('name', libdoc.name)
         writer.element('uid', self._generate_UID('SD', libdoc.name))
         writer.element('locker', '')
         writer.element(
             'html-description',
-            f"<html><p> Import of {libdoc.name} {libdoc.version}</p>{libdoc.doc}</html>",
+            f"<html><p> Import of {libdoc.name} {libdoc.version}</p>{self._library_doc(libdoc)}</html>",
         )
         writer.element('historyPK', '-1')
         writer.element('identicalVersionPK', '-1')
         writer.element('references', '')
 
     def _write_interactions(self, libdoc, writer, attachment=False):
+        if isinstance(writer, TemplateXmlWriter):
+            return self._render_interactions(libdoc, writer, attachment)
         for keyword in libdoc.keywords:
+            uid = self._generate_UID('IA', keyword.name, libdoc.name)
+            if not self._is_exported(uid):
+                continue
+            self._count_interaction(keyword)
             writer.start('element', {'type': ElementTypes.interaction.value})
-            writer.element('pk', self.pk_generator.get_pk())
+            writer.element('pk', self.context.pk_generator.get_pk())
             writer.element('name', keyword.name)
-            writer.element('uid', self._generate_UID('IA', keyword.name, libdoc.name))
+            writer.element('uid', uid)
             writer.element('locker', '')
             writer.element('status', '3')
-            writer.element('html-description', f"<html>{keyword.doc}</html>")
+            writer.element('html-description', f"<html>{self._keyword_doc(libdoc, keyword)}</html>")
             writer.element('historyPK', '-1')
             writer.element('identicalVersionPK', '-1')
             writer.start('references')
 
             if attachment:
                 writer.element(
-                    'reference-ref', attrs={'pk': self.attachment_reference_pk[libdoc.name]}
+                    'reference-ref', attrs={'pk': self.context.attachment_reference_pk[libdoc.name]}
                 )
 
             writer.end('references')
             writer.start('parameters')
             for arg in keyword.args:
                 writer.start('parameter')
-                writer.element('pk', self.pk_generator.get_pk())
+                writer.element('pk', self.context.pk_generator.get_pk())
                 writer.element('name', arg.name)
-                # For each parameter of the keyword, check whether
-                # it is already in the all_elements dic
-                # and thus already has a key.
-                # If not, its a generic data type => -1
-                typ_pk = '-1'
-                for typ in arg.types_reprs:
-                    typ_pk = Element.all_elements.get(typ, '-1')
-                    if typ_pk != '-1':
-                        break
                 # datatype-ref provides the mapping in the testbench
-                writer.element('datatype-ref', '', {'pk': typ_pk})
+                writer.element('datatype-ref', '', {'pk': self._get_datatype_pk(libdoc, arg)})
                 writer.element('definition-type', '0')
                 writer.element('use-type', '1')
                 writer.end('parameter')
             writer.end('parameters')
             writer.end('element')  # close interaction tag
 
+    def _render_interactions(self, libdoc, writer, attachment=False):
+        # Same output as _write_interactions, rendered from templates.
+        get_pk = self.context.pk_generator.get_pk
+        reference_pks = [self.context.attachment_reference_pk[libdoc.name]] if attachment else []
+        for keyword in libdoc.keywords:
+            uid = self._generate_UID('IA', keyword.name, libdoc.name)
+            if not self._is_exported(uid):
+                continue
+            self._count_interaction(keyword)
+            pk = get_pk()
+            parameters = [
+                (get_pk(), arg.name, self._get_datatype_pk(libdoc, arg)) for arg in keyword.args
+            ]
+            writer.interaction(
+                pk,
+                keyword.name,
+                uid,
+                f"<html>{self._keyword_doc(libdoc, keyword)}</html>",
+                reference_pks,
+                parameters,
+            )
+
+    def _library_doc(self, libdoc) -> str:
+        if self.context.doc_converter:
+            return self.context.doc_converter.library_doc(libdoc)
+        return libdoc.doc
+
+    def _keyword_doc(self, libdoc, keyword) -> str:
+        if self.context.doc_converter:
+            return self.context.doc_converter.keyword_doc(libdoc, keyword)
+        return keyword.doc
+
+    def _type_doc(self, libdoc, data_type) -> str:
+        if self.context.doc_converter:
+            return self.context.doc_converter.type_doc(libdoc, data_type)
+        return data_type.doc
+
+    def _count_interaction(self, keyword):
+        self.context.element_counts['interactions'] += 1
+        self.context.element_counts['parameters'] += len(keyword.args)
+
+    def _get_datatype_pk(self, libdoc, arg) -> str:
+        # Parameters whose type is not an indexed data type
+        # are generic data types => -1
+        typ_pk = self.context.type_index.resolve(arg.types_reprs, libdoc.name)
+        if typ_pk is None:
+            self.context.element_counts['generic_parameters'] += 1
+            return '-1'
+        return str(typ_pk)
+
+    def _is_shared(self, data_type) -> bool:
+        return data_type_fingerprint(data_type) in self.context.shared_data_types
+
+    def _get_datatype_uid(self, libdoc, data_type) -> str:
+        if self._is_shared(data_type):
+            return self._generate_UID('DT', data_type.name)
+        return self._generate_UID('DT', data_type.name, libdoc.name)
+
+    def _write_shared_data_types(self, writer):
+        datatypes = [
+            (data_type, self._generate_UID('DT', data_type.name))
+            for data_type in self.context.shared_data_types.values()
+        ]
+        self._write_datatype_subdivision(
+            [(data_type, uid) for data_type, uid in datatypes if self._is_exported(uid)],
+            self._generate_UID('SD', '_Datatypes'),
+            writer,
+        )
+
     def _write_data_types(self, libdoc, writer):
         datatypes = []
-        if libdoc.data_types.enums:
-            for data_type in libdoc.data_types.enums:
-                datatypes.append(DataType(self.pk_generator, data_type))
+        for data_type in libdoc.data_types:
+            if data_type.type != 'Enum':
+                # TypedDicts are generic data types in the TestBench.
+                self.context.type_index.add(data_type.name, None, libdoc.name)
+                continue
+            if self._is_shared(data_type):
+                # Parameters of this library refer to the shared data type.
+                shared = self.context.shared_data_types[data_type_fingerprint(data_type)]
+                self.context.type_index.add(shared.name, shared.pk, libdoc.name)
+                continue
+            # Every data type is registered, even if it is not written.
+            data_type = DataType(self.context, data_type, doc=self._type_doc(libdoc, data_type))
+            self.context.type_index.add(data_type.name, data_type.pk, libdoc.name)
+            uid = self._generate_UID('DT', data_type.name, libdoc.name)
+            if self._is_exported(uid):
+                datatypes.append((data_type, uid))
+        self._write_datatype_subdivision(
+            datatypes, self._generate_UID('SD', '_Datatypes', libdoc.name), writer
+        )
 
+    def _write_datatype_subdivision(self, datatypes, uid, writer):
+        # Writes the (DataType, uid) datatypes to a _Datatypes subdivision.
+        if datatypes:
             writer.start('element', {'type': ElementTypes.subdivision.value})
-            writer.element('pk', self.pk_generator.get_pk())
+            writer.element('pk', self.context.pk_generator.get_pk())
             writer.element('name', '_Datatypes')
-            writer.element('uid', self._generate_UID('SD', '_Datatypes', libdoc.name))
+            writer.element('uid', uid)
             writer.element('locker', '')
             writer.element('status', '3')
             writer.element('html-description', '')
@@ -379,37 +848,38 @@ class Libdoc2TestBenchWriter:
             writer.element('identicalVersionPK', '-1')
             writer.element('references', '')
 
-            for idx, data_type in enumerate(datatypes):
+            for idx, (data_type, uid) in enumerate(datatypes):
+                self.context.element_counts['datatypes'] += 1
+                self.context.element_counts['representatives'] += len(data_type.representatives)
                 writer.start('element', {'type': ElementTypes.datatype.value})
-                writer.element('pk', data_type.pk)
-                writer.element('name', data_type.get_name())
-                writer.element('uid', self._generate_UID('DT', data_type.name, libdoc.name))
+                writer.element('pk', str(data_type.pk))
+                writer.element('name', data_type.name)
+                writer.element('uid', uid)
                 writer.element('locker', '')
                 writer.element('html-description', data_type.html_desc)
                 writer.element('historyPK', '-1')
                 writer.element('identicalVersionPK', '-1')
                 writer.start('equivalence-classes')
                 writer.start('equivalence-class')
-                writer.element('pk', self.pk_generator.get_pk())
+                writer.element('pk', self.context.pk_generator.get_pk())
                 writer.element('name', 'members')
                 writer.element('description', 'Valid members')
                 writer.element('ordering', str(1024 * idx))
 
                 writer.start('representatives')
-                default_pk = '-1'
-                for idx, representative in enumerate(data_type.representatives.keys()):
+                default_pk = -1
+                for idx, (name, pk) in enumerate(data_type.representatives):
                     writer.start('representative')
-                    pk = Element.all_elements[representative]
                     if idx == 0:
                         # if non-generic => set default-representative
                         default_pk = pk
-                    writer.element('pk', pk)
-                    writer.element('name', representative.split(f"{data_type.get_name()}.", 1)[-1])
+                    writer.element('pk', str(pk))
+                    writer.element('name', name)
                     writer.element('ordering', str(1024 * (idx + 1)))
                     writer.end('representative')
 
                 writer.end('representatives')
-                writer.element('default-representative-ref', '', {'pk': default_pk})
+                writer.element('default-representative-ref', '', {'pk': str(default_pk)})
                 writer.end('equivalence-class')
                 writer.end('equivalence-classes')
                 writer.end('element')  # close dataType tag
@@ -439,7 +909,7 @@ class Libdoc2TestBenchWriter:
         # UIDs format:
         # Prefix: RepositoryID-AbreviationElementType-
         # Root: first 10 characters of sha1Hash of LibraryName.ElementName
-        repository_id = self.xml_attributes.get('repository', 'itb')
+        repository_id = self.context.xml_attributes.get('repository', 'itb')
 
         # robustify element name regarding smaller changes
         element_name = element_name.replace('_', '')
@@ -449,3 +919,51 @@ class Libdoc2TestBenchWriter:
         prefix = f"{repository_id}-{element_type}-"
         root_hash = sha1(f"{lib_name}.{element_name}".encode()).hexdigest()[:10]
         return f"{prefix}{root_hash}"
+
+
+# The HtmlDocConverter of a render worker process, shared by its libraries.
+_render_doc_converter = None
+
+
+def init_render_worker(memo: dict = None):
+    """Initializes a render worker process. If ``memo`` is given, docs are
+    converted by one converter that starts with these formatted docs."""
+    global _render_doc_converter
+    if memo is not None:
+        _render_doc_converter = HtmlDocConverter(memo)
+
+
+def render_library(options, state, libdoc, first_pk: int, attachment: bool):
+    """Renders the subdivision of a library in a worker process.
+
+    ``libdoc`` is a model.LibraryModel. ``options`` are the emitter,
+    convert_docs and shared_datatypes options of the writer and ``state``
+    the parts of its WriterContext that are needed to write a library. The
+    pks of the library start after ``first_pk``. Returns the XML fragment,
+    the last issued pk, the element counts, the doc conversion timings and
+    the docs formatted for this library."""
+    emitter, convert_docs, shared_datatypes = options
+    testbench_writer = Libdoc2TestBenchWriter(
+        emitter=emitter, convert_docs=convert_docs, shared_datatypes=shared_datatypes
+    )
+    context = testbench_writer.context = WriterContext(
+        first_pk=first_pk, convert_docs=convert_docs, doc_converter=_render_doc_converter
+    )
+    for name, value in state.items():
+        setattr(context, name, value)
+    doc_converter = context.doc_converter
+    output = io.StringIO()
+    if emitter == 'template':
+        writer = TemplateXmlWriter(output)
+    else:
+        writer = XmlWriter(output)
+    testbench_writer._write_library(libdoc, writer, attachment)
+    if isinstance(writer, TemplateXmlWriter):
+        writer._flush()
+    # The fragment without the XML declaration of the writer.
+    fragment = output.getvalue().split('\n', 1)[1]
+    timings, docs = {}, {}
+    if doc_converter:
+        timings = {libdoc.name: doc_converter.timings.pop(libdoc.name, 0.0)}
+        docs = doc_converter.get_library_docs(libdoc)
+    return fragment, context.pk_generator.pk_counter, context.element_counts, timings, docs
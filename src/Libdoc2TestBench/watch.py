@@ -0,0 +1,150 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Watch mode that rewrites the project dump whenever one of its sources changes.
+
+The import list file and the sources of all loaded libdocs are polled.
+Libdocs are kept in a LibdocStore, so a rebuild only loads the entries
+whose source changed, and the HTML conversion of unchanged docs is reused.
+"""
+
+import os
+import time
+
+from .libdoccache import LibdocStore, find_source, source_fingerprint
+
+DEFAULT_INTERVAL = 1.0
+
+
+def watch_project_dump(
+    lib_or_res: str,
+    outfile_path: str,
+    specdocformat,
+    docformat,
+    lib_name,
+    lib_version,
+    repo_id,
+    xml_flag,
+    library_root,
+    resource_root,
+    attachment: bool,
+    baseline_path: str = None,
+    emitter: str = 'xmlwriter',
+    compression: str = 'stored',
+    compresslevel: int = None,
+    shared_datatypes: bool = False,
+    interval: float = DEFAULT_INTERVAL,
+    include: list = None,
+    exclude: list = None,
+):
+    """Writes the project dump and writes it again after every change of its
+    sources until interrupted with Ctrl+C."""
+    from . import confirm_overwrite, get_entries, get_outfile_path, load_baseline, write_output
+
+    baseline = load_baseline(baseline_path) if baseline_path else None
+    doc_converter = None
+    if specdocformat == 'HTML':
+        from .htmldocs import HtmlDocConverter
+
+        doc_converter = HtmlDocConverter()
+    writer_args = (
+        repo_id,
+        library_root,
+        resource_root,
+        attachment,
+        baseline,
+        emitter,
+        None,
+        specdocformat == 'HTML',
+        doc_converter,
+        shared_datatypes,
+    )
+    store = LibdocStore()
+    confirmed = False
+    try:
+        while True:
+            start = time.perf_counter()
+            # A scanned directory is watched as a whole to find new files.
+            watched_paths = [lib_or_res]
+            try:
+                names = {}
+                entries = get_entries(lib_or_res, include, exclude, names) or [lib_or_res]
+                watched_paths.extend(find_source(entry) for entry in entries)
+                libraries, resources = [], []
+                for entry in entries:
+                    libdoc = store.get(entry, names.get(entry, lib_name), lib_version, docformat)
+                    (resources if libdoc.type == 'RESOURCE' else libraries).append(libdoc)
+                    watched_paths.append(libdoc.source)
+                if not confirmed:
+                    outfile_path = get_outfile_path(outfile_path, libraries + resources, xml_flag)
+                    confirm_overwrite(outfile_path)
+                    confirmed = True
+                write_output(
+                    outfile_path,
+                    libraries,
+                    resources,
+                    xml_flag,
+                    writer_args,
+                    compression,
+                    compresslevel,
+                )
+                print(f"Project dump written in {time.perf_counter() - start:.2f} s.")
+            except (Exception, SystemExit) as error:
+                if not confirmed:
+                    raise
+                # Keep watching, the error is probably fixed with the next change.
+                print(f"Writing the project dump failed: {error}")
+            print(f"Watching {len(set(filter(None, watched_paths)))} files, Ctrl+C to stop.")
+            for path in wait_for_changes(filter(None, watched_paths), interval):
+                print(f"Changed: {path}")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def wait_for_changes(paths, interval: float = DEFAULT_INTERVAL) -> list:
+    """Polls ``paths`` every ``interval`` seconds and returns the changed ones.
+
+    The mtime and size of every path are compared first. The files below the
+    directories are only compared if none of the paths themselves changed."""
+    signatures = {path: (get_signature(path), get_tree_signature(path)) for path in paths}
+    while True:
+        time.sleep(interval)
+        changed = [path for path, (stat, _) in signatures.items() if get_signature(path) != stat]
+        if not changed:
+            changed = [
+                path
+                for path, (_, tree) in signatures.items()
+                if tree is not None and get_tree_signature(path) != tree
+            ]
+        if changed:
+            return changed
+
+
+def get_signature(path: str):
+    # A directory's mtime changes when a file is added to or removed from it.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_tree_signature(path: str):
+    # The files below a directory, None for files.
+    try:
+        if os.path.isdir(path):
+            return source_fingerprint(path)
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,154 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  This code contains derived code from Robot Framework Core Project
+#  under Apache 2.0 License.
+#  https://github.com/robotframework/robotframework
+
+"""High-throughput XML emitter for the Libdoc2TestBenchWriter.
+
+The TemplateXmlWriter renders interactions and their parameters from
+precompiled templates instead of single XmlWriter calls and buffers the
+output. Its output is byte-for-byte identical to robot.utils.XmlWriter.
+"""
+
+import re
+
+from robot.utils import XmlWriter
+
+# Same escaping as robot.utils.markuputils.xml_escape.
+_illegal_chars_in_xml = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_attribute_escapes = (
+    ('&', '&amp;'),
+    ('<', '&lt;'),
+    ('>', '&gt;'),
+    ('"', '&quot;'),
+    ('\n', '&#10;'),
+    ('\r', '&#13;'),
+    ('\t', '&#09;'),
+)
+
+INTERACTION_TEMPLATE = (
+    '<element type="interaction">\n'
+    '<pk>{pk}</pk>\n'
+    '{name}'
+    '<uid>{uid}</uid>\n'
+    '<locker/>\n'
+    '<status>3</status>\n'
+    '<html-description>{html_description}</html-description>\n'
+    '<historyPK>-1</historyPK>\n'
+    '<identicalVersionPK>-1</identicalVersionPK>\n'
+    '<references>\n'
+    '{references}'
+    '</references>\n'
+    '<parameters>\n'
+    '{parameters}'
+    '</parameters>\n'
+    '</element>\n'
+)
+REFERENCE_TEMPLATE = '<reference-ref pk="{pk}"/>\n'
+PARAMETER_TEMPLATE = (
+    '<parameter>\n'
+    '<pk>{pk}</pk>\n'
+    '{name}'
+    '<datatype-ref pk="{datatype_pk}"/>\n'
+    '<definition-type>0</definition-type>\n'
+    '<use-type>1</use-type>\n'
+    '</parameter>\n'
+)
+
+
+def xml_escape(text: str) -> str:
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return _illegal_chars_in_xml.sub('', text)
+
+
+def attribute_escape(text: str) -> str:
+    for name, value in _attribute_escapes:
+        if name in text:
+            text = text.replace(name, value)
+    return _illegal_chars_in_xml.sub('', text)
+
+
+def escape_batch(texts):
+    """Escapes many short texts with a single pass over the joined texts."""
+    if any('\n' in text for text in texts):
+        return [xml_escape(text) for text in texts]
+    return xml_escape('\n'.join(texts)).split('\n')
+
+
+def _name_element(name: str, escaped_name: str) -> str:
+    # XmlWriter writes elements without text as self-closing tags, text that
+    # is empty after removing illegal characters gets a start and end tag.
+    return f'<name>{escaped_name}</name>\n' if name else '<name/>\n'
+
+
+class TemplateXmlWriter(XmlWriter):
+    """XmlWriter with buffered output and template based interaction rendering."""
+
+    def __init__(self, output, usage=None, buffer_size: int = 1 << 16):
+        self._buffer = []
+        self._buffered = 0
+        self._buffer_size = buffer_size
+        super().__init__(output, usage=usage)
+
+    def interaction(self, pk, name, uid, html_description, reference_pks, parameters):
+        """Renders a complete interaction element.
+
+        ``parameters`` is a list of (pk, name, datatype pk) tuples."""
+        escaped_names = escape_batch([name] + [param[1] for param in parameters])
+        references = ''.join(
+            REFERENCE_TEMPLATE.format(pk=attribute_escape(ref_pk)) for ref_pk in reference_pks
+        )
+        rendered_parameters = ''.join(
+            PARAMETER_TEMPLATE.format(
+                pk=param_pk,
+                name=_name_element(name, escaped_name),
+                datatype_pk=attribute_escape(datatype_pk),
+            )
+            for (param_pk, name, datatype_pk), escaped_name in zip(parameters, escaped_names[1:])
+        )
+        self._write(
+            INTERACTION_TEMPLATE.format(
+                pk=pk,
+                name=_name_element(name, escaped_names[0]),
+                uid=xml_escape(uid),
+                html_description=xml_escape(html_description),
+                references=references,
+                parameters=rendered_parameters,
+            )
+        )
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def _write(self, text, newline=False):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if newline:
+            self._buffer.append('\n')
+        if self._buffered >= self._buffer_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self.output.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
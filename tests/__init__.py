@@ -0,0 +1,59 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Regression tests of Libdoc2TestBench, run with ``python -m pytest``.
+
+Every test is tagged with a ``# [user-NNN]`` comment naming the change
+request whose behavior it covers.
+"""
+
+import re
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+def without_created_time(xml: str) -> str:
+    """Returns a project dump without its created time, which differs per run."""
+    return re.sub('<createdTime>[^<]*</createdTime>', '', xml)
+
+
+def get_pks(xml: str) -> list:
+    """Returns the primary keys of all elements of a project dump."""
+    return [int(pk) for pk in re.findall('<pk>([0-9]+)</pk>', xml)]
+
+
+def get_elements(xml: str, element_type: str) -> dict:
+    """Returns name -> pk of the test elements of a type, e.g. 'datatype'."""
+    root = ElementTree.fromstring(xml)
+    return {
+        element.findtext('name'): int(element.findtext('pk'))
+        for element in root.iter('element')
+        if element.get('type') == element_type
+    }
+
+
+def get_parameter_types(xml: str) -> dict:
+    """Returns (interaction name, parameter name) -> pk of the data type."""
+    root = ElementTree.fromstring(xml)
+    return {
+        (element.findtext('name'), parameter.findtext('name')): int(
+            parameter.find('datatype-ref').get('pk')
+        )
+        for element in root.iter('element')
+        if element.get('type') == 'interaction'
+        for parameter in element.iter('parameter')
+    }
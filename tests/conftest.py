@@ -0,0 +1,105 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Fixtures of the regression tests.
+
+The project consists of two libraries and a resource file. ``Painter``
+refers to the data type ``Color`` of ``Colors``, which is written after it,
+and has a TypedDict ``Options`` besides the enum ``Options`` of ``Colors``.
+"""
+
+import io
+
+import pytest
+
+from Libdoc2TestBench import write_dump
+
+from . import without_created_time
+
+# TypedDict is imported with its module, a function would be a keyword.
+PAINTER = '''
+import typing
+
+
+class Options(typing.TypedDict):
+    depth: int
+
+
+def paint(color: 'Color', options: Options):
+    """Paints with a *color* of ``Colors``."""
+'''
+
+COLORS = '''
+from enum import Enum
+
+
+class Color(Enum):
+    """The colors to paint with."""
+
+    red = 1
+    blue = 2
+
+
+class Options(Enum):
+    """How to mix."""
+
+    fast = 1
+    slow = 2
+
+
+def mix(color: Color, options: Options, amount: int = 1):
+    """Mixes _paint_."""
+'''
+
+KEYWORDS = '''*** Keywords ***
+Paint Wall
+    [Documentation]    Paints a wall with a *color*.
+    [Arguments]    ${color}
+    No Operation
+'''
+
+
+@pytest.fixture(scope='session')
+def project(tmp_path_factory):
+    """Returns the paths of the libraries and the resource file."""
+    directory = tmp_path_factory.mktemp('project')
+    for name, source in (
+        ('Painter.py', PAINTER),
+        ('Colors.py', COLORS),
+        ('keywords.resource', KEYWORDS),
+    ):
+        directory.joinpath(name).write_text(source, encoding='UTF-8')
+    return [str(directory / name) for name in ('Painter.py', 'Colors.py', 'keywords.resource')]
+
+
+@pytest.fixture(scope='session')
+def dump():
+    """Returns a function writing a project dump with write_dump, which
+    returns the XML without its created time."""
+
+    def write(libdocs, **options) -> str:
+        output = io.BytesIO()
+        write_dump(libdocs, output, xml=True, **options)
+        return without_created_time(output.getvalue().decode('UTF-8'))
+
+    return write
+
+
+@pytest.fixture
+def libdocs(project):
+    """Returns the loaded libraries and resources of the project."""
+    from Libdoc2TestBench import create_libdoc
+
+    loaded = [create_libdoc(path, None, None, None, 'RAW') for path in project]
+    return loaded[:2], loaded[2:]
@@ -0,0 +1,82 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import shutil
+import zipfile
+
+import pytest
+
+from Libdoc2TestBench.baseline import read_baseline
+
+from . import get_elements
+
+
+# [user-004]
+def test_unchanged_project_exports_nothing(project, dump, tmp_path):
+    baseline = tmp_path / 'baseline.xml'
+    baseline.write_text(dump(project), encoding='UTF-8')
+    xml = dump(project, baseline=str(baseline))
+    assert get_elements(xml, 'interaction') == {}
+    assert get_elements(xml, 'datatype') == {}
+
+
+# [user-004]
+def test_changed_resource_exports_changed_interactions(project, dump, tmp_path):
+    resource = tmp_path / 'keywords.resource'
+    shutil.copy(project[2], resource)
+    libdocs = project[:2] + [str(resource)]
+    baseline = tmp_path / 'baseline.xml'
+    baseline.write_text(dump(libdocs), encoding='UTF-8')
+    with open(resource, 'a', encoding='UTF-8') as resource_file:
+        resource_file.write('Clean Wall\n    No Operation\n')
+    xml = dump(libdocs, baseline=str(baseline))
+    assert list(get_elements(xml, 'interaction')) == ['Clean Wall']
+
+
+# [user-004]
+def test_new_data_type_exports_referring_interactions(project, dump, tmp_path):
+    baseline = tmp_path / 'baseline.xml'
+    # In the baseline, the color parameter of Paint has no data type.
+    baseline.write_text(dump(project[:1]), encoding='UTF-8')
+    xml = dump(project[:2], baseline=str(baseline))
+    assert set(get_elements(xml, 'datatype')) == {'Color', 'Options'}
+    assert set(get_elements(xml, 'interaction')) == {'Paint', 'Mix'}
+
+
+# [user-004]
+@pytest.mark.parametrize(
+    'name, content, reason',
+    [
+        ('missing.zip', None, 'cannot be read'),
+        ('baseline.zip', b'no zip', 'neither a zip file'),
+        ('baseline.xml', b'<project-dump>', 'cannot be read'),
+        ('baseline.xml', b'<keywordspec/>', 'cannot be read'),
+        ('baseline.zip', 'other.xml', 'does not contain a project-dump.xml'),
+    ],
+)
+def test_unreadable_baseline_raises_value_error(tmp_path, name, content, reason):
+    path = tmp_path / name
+    if isinstance(content, bytes):
+        path.write_bytes(content)
+    elif content:
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr(content, '<project-dump/>')
+    with pytest.raises(ValueError, match=reason):
+        read_baseline(str(path))
+
+
+# [user-004]
+def test_unreadable_baseline_fails_before_loading(project, dump, tmp_path):
+    with pytest.raises(ValueError, match='cannot be read'):
+        dump(project + [str(tmp_path / 'missing.robot')], baseline=str(tmp_path / 'missing.xml'))
@@ -0,0 +1,53 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+
+import pytest
+
+from Libdoc2TestBench.batch import read_manifest
+
+
+def write_manifest(tmp_path, outputs) -> str:
+    manifest_path = tmp_path / 'batch.json'
+    manifest_path.write_text(json.dumps({'outputs': outputs}), encoding='UTF-8')
+    return str(manifest_path)
+
+
+# [user-011]
+@pytest.mark.parametrize(
+    'first, second',
+    [
+        ({'output': 'dump'}, {'output': 'dump.zip'}),
+        ({'output': 'dump.xml', 'xml': True}, {'output': './out/../dump', 'xml': True}),
+    ],
+)
+def test_outputs_to_the_same_file_are_rejected(tmp_path, first, second):
+    manifest_path = write_manifest(
+        tmp_path, [dict(first, libraries='BuiltIn'), dict(second, libraries='String')]
+    )
+    with pytest.raises(ValueError, match='Outputs 0 and 1 of batch manifest are both written'):
+        read_manifest(manifest_path, {'xml': False})
+
+
+# [user-011]
+def test_outputs_in_other_formats_are_separate_files(tmp_path):
+    manifest_path = write_manifest(
+        tmp_path,
+        [
+            {'libraries': 'BuiltIn', 'output': 'dump'},
+            {'libraries': 'BuiltIn', 'output': 'dump', 'xml': True},
+        ],
+    )
+    assert len(read_manifest(manifest_path, {'xml': False})) == 2
@@ -0,0 +1,37 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+
+from Libdoc2TestBench import start_libdoc2testbench
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr('sys.argv', ['Libdoc2TestBench', *args])
+    with pytest.raises(SystemExit) as error:
+        start_libdoc2testbench()
+    return error.value.code
+
+
+# [user-001]
+def test_jobs_must_be_positive(monkeypatch, capsys, project, tmp_path):
+    assert run(monkeypatch, project[0], str(tmp_path / 'dump.zip'), '--jobs', '0') == 2
+    assert 'argument --jobs: must be greater than 0' in capsys.readouterr().err
+
+
+# [user-001]
+def test_version_does_not_create_the_cache(monkeypatch, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    assert run(monkeypatch, '--version', '--cache-dir', str(cache_dir)) is None
+    assert not cache_dir.exists()
@@ -0,0 +1,53 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from Libdoc2TestBench import write_dump
+from Libdoc2TestBench.compression import COMPRESS_TYPES, write_attachments
+
+
+# [user-014]
+@pytest.mark.parametrize('compression', sorted(COMPRESS_TYPES))
+def test_attachments_are_compressed_in_order(tmp_path, compression):
+    attachments = []
+    for index in range(3):
+        path = tmp_path / f'keywords{index}.resource'
+        path.write_text('*** Keywords ***\n' * (index + 100), encoding='UTF-8')
+        attachments.append((str(path), f'attachments/keywords{index}.resource'))
+    zip_path = tmp_path / 'project-dump.zip'
+    compress_type = COMPRESS_TYPES[compression]
+    with zipfile.ZipFile(zip_path, 'w', compress_type, compresslevel=None) as zip_file:
+        write_attachments(zip_file, attachments, jobs=2)
+    with zipfile.ZipFile(zip_path) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == [arcname for _, arcname in attachments]
+        for (path, arcname), info in zip(attachments, zip_file.infolist()):
+            assert info.compress_type == compress_type
+            assert zip_file.read(arcname) == Path(path).read_bytes()
+
+
+# [user-003]
+def test_project_dump_entry_is_dated_and_compressed(project):
+    output = io.BytesIO()
+    write_dump(project, output, attachment=True, compression='deflated', compresslevel=1)
+    with zipfile.ZipFile(output) as zip_file:
+        assert zip_file.testzip() is None
+        info = zip_file.getinfo('project-dump.xml')
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.date_time[0] > 1980
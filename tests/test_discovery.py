@@ -0,0 +1,79 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+
+from Libdoc2TestBench import get_entries
+from Libdoc2TestBench.discovery import check_unique_names, expand_entries
+
+from . import get_elements
+
+KEYWORD = '*** Keywords ***\n{}\n    No Operation\n'
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in ('top.resource', 'a/keywords.resource', 'b/keywords.resource', 'venv/v.resource'):
+        tmp_path.joinpath(path).parent.mkdir(exist_ok=True)
+        tmp_path.joinpath(path).write_text(KEYWORD.format(path), encoding='UTF-8')
+    tmp_path.joinpath('venv', 'pyvenv.cfg').write_text('', encoding='UTF-8')
+    return tmp_path
+
+
+# [user-023]
+def test_files_in_subdirectories_are_named_after_their_path(tree):
+    names = {}
+    entries = expand_entries([str(tree)], names=names)
+    assert entries == [
+        str(tree / 'a' / 'keywords.resource'),
+        str(tree / 'b' / 'keywords.resource'),
+        str(tree / 'top.resource'),
+    ]
+    assert names == {entries[0]: 'a.keywords', entries[1]: 'b.keywords'}
+
+
+# [user-023]
+def test_glob_names_files_relative_to_its_base(tree):
+    names = {}
+    entries = expand_entries([str(tree / '*' / 'keywords.resource')], names=names)
+    assert list(names.values()) == ['a.keywords', 'b.keywords']
+    assert len(entries) == 2
+
+
+# [user-023]
+def test_scanned_files_with_same_file_name_are_written(tree, dump):
+    subdivisions = get_elements(dump([str(tree)]), 'subdivision')
+    assert {'a.keywords', 'b.keywords', 'top'} <= set(subdivisions)
+
+
+# [user-023]
+def test_exclude_is_relative_to_scan_root(tree):
+    for entry in (str(tree), str(tree / '**' / '*.resource')):
+        assert expand_entries([entry], exclude=['a/*']) == [
+            str(tree / 'b' / 'keywords.resource'),
+            str(tree / 'top.resource'),
+        ]
+
+
+# [user-023]
+def test_same_names_are_rejected_before_loading(tree):
+    import_list = tree / 'import-list.robot'
+    import_list.write_text(
+        f"*** Import List ***\n{tree / 'a/keywords.resource'}\n{tree / 'b/keywords.resource'}\n",
+        encoding='UTF-8',
+    )
+    with pytest.raises(ValueError, match="would both be written as"):
+        check_unique_names([str(tree / 'a/keywords.resource'), str(tree / 'b/keywords.resource')])
+    with pytest.raises(SystemExit, match="would both be written as"):
+        get_entries(str(import_list))
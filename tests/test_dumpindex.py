@@ -0,0 +1,46 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from Libdoc2TestBench.dumpindex import DumpIndex
+
+
+# [user-025]
+def test_index_finds_elements(project, dump, tmp_path):
+    dump_path = tmp_path / 'project-dump.xml'
+    dump_path.write_text(dump(project), encoding='UTF-8')
+    with DumpIndex(str(tmp_path / 'index.sqlite')) as index:
+        assert index.update(str(dump_path))
+        assert not index.update(str(dump_path))
+        matches = index.find(name='pa*', element_type='interaction')
+        assert [(match.name, match.type, match.library) for match in matches] == [
+            ('Paint', 'interaction', 'Painter'),
+            ('Paint Wall', 'interaction', 'keywords'),
+        ]
+        assert index.find(uid=matches[0].uid) == matches[:1]
+        assert [row[1:] for row in index.summary()] == [
+            ('Painter', 1, 0),
+            ('Colors', 1, 2),
+            ('keywords', 1, 0),
+        ]
+
+
+# [user-025]
+def test_index_removes_deleted_dumps(project, dump, tmp_path):
+    dump_path = tmp_path / 'project-dump.xml'
+    dump_path.write_text(dump(project), encoding='UTF-8')
+    with DumpIndex(str(tmp_path / 'index.sqlite')) as index:
+        index.update(str(dump_path))
+        dump_path.unlink()
+        assert index.prune() == [str(dump_path)]
+        assert index.find(name='*') == []
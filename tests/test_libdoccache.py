@@ -0,0 +1,61 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from Libdoc2TestBench.htmldocs import HtmlDocConverter
+from Libdoc2TestBench.libdoccache import LibdocCache
+
+
+# [user-002]
+def test_cache_key_changes_with_source(tmp_path):
+    cache = LibdocCache(tmp_path / 'cache')
+    resource = tmp_path / 'keywords.resource'
+    resource.write_text('*** Keywords ***\nFirst\n    No Operation\n', encoding='UTF-8')
+    key = cache.get_key(str(resource), None, None, None, 'HTML')
+    assert cache.get_key(str(resource), None, None, None, 'HTML') == key
+    resource.write_text('*** Keywords ***\nSecond\n    No Operation\n', encoding='UTF-8')
+    assert cache.get_key(str(resource), None, None, None, 'HTML') != key
+
+
+# [user-002]
+def test_cache_key_changes_with_arguments(tmp_path):
+    cache = LibdocCache(tmp_path / 'cache')
+    resource = tmp_path / 'keywords.resource'
+    resource.write_text('*** Keywords ***\nFirst\n    No Operation\n', encoding='UTF-8')
+    key = cache.get_key(str(resource), None, None, None, 'HTML')
+    assert cache.get_key(str(resource), None, '2.0', None, 'HTML') != key
+    assert cache.get_key(str(resource), None, None, 'TEXT', 'HTML') != key
+    assert cache.get_key(str(resource), None, None, None, 'RAW') != key
+
+
+# [user-002]
+def test_unknown_source_has_no_key(tmp_path):
+    cache = LibdocCache(tmp_path / 'cache')
+    assert cache.get_key(str(tmp_path / 'missing.resource'), None, None, None, 'HTML') is None
+
+
+# [user-002]
+def test_converted_docs_are_kept_between_runs(libdocs, tmp_path):
+    painter = libdocs[0][0]
+    keyword = painter.keywords[0]
+    cache = LibdocCache(tmp_path / 'cache')
+    doc_converter = HtmlDocConverter()
+    html = doc_converter.keyword_doc(painter, keyword)
+    cache.store_docs(painter, doc_converter.get_library_docs(painter))
+
+    docs = cache.load_docs(painter)
+    assert docs == doc_converter.get_library_docs(painter)
+    # The next run uses the stored doc instead of converting it again.
+    next_converter = HtmlDocConverter({key: 'stored' for key in docs})
+    assert next_converter.keyword_doc(painter, keyword) == 'stored'
+    assert html != 'stored'
@@ -0,0 +1,44 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from robot.libdocpkg import LibraryDocumentation
+
+from Libdoc2TestBench.pipeline import LibdocStream, split_entries
+
+
+# [user-015]
+def test_entries_loaded_to_split_them_are_not_loaded_again(tmp_path, monkeypatch):
+    resource_dir = tmp_path / 'resources'
+    resource_dir.mkdir()
+    (resource_dir / 'keywords.resource').write_text(
+        '*** Keywords ***\nLog Twice\n    Log    twice\n', encoding='UTF-8'
+    )
+    # The resource file is found in PYTHONPATH, not in the working directory.
+    monkeypatch.syspath_prepend(str(resource_dir))
+    monkeypatch.chdir(tmp_path)
+    loads = []
+
+    def load(entry):
+        loads.append(entry)
+        return LibraryDocumentation(entry), {}
+
+    library_entries, resource_entries, loaded = split_entries(['String', 'keywords.resource'], load)
+    assert (library_entries, resource_entries) == (['String'], ['keywords.resource'])
+    assert loads == ['keywords.resource']
+    libraries = LibdocStream(library_entries, load, loaded=loaded)
+    resources = LibdocStream(resource_entries, load, loaded=loaded)
+    assert [library.name for library in libraries] == ['String']
+    assert [resource.name for resource in resources] == ['keywords']
+    assert loads == ['keywords.resource', 'String']
+    assert loaded == {}
@@ -0,0 +1,50 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+
+from Libdoc2TestBench.libdoccache import LibdocStore
+from Libdoc2TestBench.server import DumpHTTPServer, DumpRequestHandler, start_server
+
+
+@pytest.fixture
+def server():
+    server = DumpHTTPServer(('127.0.0.1', 0), DumpRequestHandler, bind_and_activate=False)
+    server.libdoc_store = LibdocStore()
+    yield server
+    server.server_close()
+
+
+# [user-010]
+def test_libraries_must_be_a_list(server, project):
+    with pytest.raises(ValueError, match="'libraries' must be a list"):
+        server.create_dump({'libraries': project[0]})
+
+
+# [user-010]
+def test_directories_and_import_lists_are_rejected(server, project, tmp_path):
+    import_list = tmp_path / 'libraries.txt'
+    import_list.write_text('*** Import List ***\n' + project[0] + '\n', encoding='UTF-8')
+    for entry in (str(tmp_path), str(import_list)):
+        with pytest.raises(ValueError, match='List its libraries and resources instead'):
+            server.create_dump({'libraries': [entry]})
+
+
+# [user-010]
+def test_other_files_at_the_socket_path_are_kept(tmp_path):
+    path = tmp_path / 'server.sock'
+    path.write_text('keep', encoding='UTF-8')
+    with pytest.raises(SystemExit):
+        start_server(['--socket', str(path)])
+    assert path.read_text(encoding='UTF-8') == 'keep'
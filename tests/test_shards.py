@@ -0,0 +1,71 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+
+from Libdoc2TestBench.baseline import read_baseline
+from Libdoc2TestBench.shards import get_manifest_path, write_shards
+
+from . import get_pks
+
+
+def get_writer_args(baseline=None):
+    # The arguments of write_project_dump after the resources.
+    return (None, 'RF', 'Resource', False, baseline, 'xmlwriter', None, True, None, False, 1)
+
+
+# [user-021]
+def test_shard_pk_ranges_are_contiguous(libdocs, tmp_path):
+    libraries, resources = libdocs
+    outfile_path = str(tmp_path / 'project-dump.xml')
+    paths = write_shards(outfile_path, libraries, resources, True, get_writer_args())
+    with open(get_manifest_path(outfile_path), encoding='UTF-8') as manifest_file:
+        shards = json.load(manifest_file)['shards']
+    assert [shard['output'] for shard in shards] == [
+        'project-dump-1.xml',
+        'project-dump-2.xml',
+        'project-dump-3.xml',
+    ]
+    first_pk = 231
+    for path, shard in zip(paths, shards):
+        with open(path, encoding='UTF-8') as shard_file:
+            pks = get_pks(shard_file.read())
+        assert shard['first_pk'] == first_pk
+        assert min(pks) == shard['first_pk']
+        assert max(pks) == shard['last_pk']
+        first_pk = shard['last_pk'] + 1
+
+
+# [user-021]
+def test_shards_are_compared_to_their_own_baseline_elements(libdocs, tmp_path, capsys):
+    libraries, resources = libdocs
+    outfile_path = str(tmp_path / 'project-dump.xml')
+    paths = write_shards(outfile_path, libraries, resources, True, get_writer_args())
+    with open(get_manifest_path(outfile_path), encoding='UTF-8') as manifest_file:
+        assert [shard['elements'] for shard in json.load(manifest_file)['shards']] == [1, 3, 1]
+    capsys.readouterr()
+
+    # The previous export was sharded too, one element was removed since.
+    baseline = {'itb-IA-0000000000': ('Removed Keyword', '')}
+    for path in paths:
+        baseline.update(read_baseline(path))
+    outfile_path = str(tmp_path / 'delta.xml')
+    write_shards(outfile_path, libraries, resources, True, get_writer_args(baseline))
+    output = capsys.readouterr().out
+    assert output.count('0 changed') == 3
+    assert output.count('0 added') == 3
+    assert output.count('1 removed') == 1
+    assert output.count('0 removed') == 2
+    with open(get_manifest_path(outfile_path), encoding='UTF-8') as manifest_file:
+        assert [shard['elements'] for shard in json.load(manifest_file)['shards']] == [0, 0, 0]
@@ -0,0 +1,139 @@
+#  Copyright 2021- imbus AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+
+import pytest
+
+from Libdoc2TestBench.htmldocs import HtmlDocConverter
+from Libdoc2TestBench.testbenchwriter import Libdoc2TestBenchWriter, TypeIndex
+
+from . import get_elements, get_parameter_types, without_created_time
+
+
+def write(libdocs, path, **options) -> str:
+    libraries, resources = libdocs
+    Libdoc2TestBenchWriter(**options).write(
+        libraries, resources, str(path), None, 'RF', 'Resource', True
+    )
+    return without_created_time(path.read_text(encoding='UTF-8'))
+
+
+# [user-006]
+def test_emitters_write_identical_output(project, dump):
+    assert dump(project, emitter='template') == dump(project)
+
+
+# [user-022]
+def test_render_jobs_write_identical_output(libdocs, tmp_path):
+    expected = write(libdocs, tmp_path / 'sequential.xml', convert_docs=True)
+    rendered = write(libdocs, tmp_path / 'rendered.xml', convert_docs=True, jobs=2)
+    assert rendered == expected
+
+
+# [user-022]
+def test_render_jobs_fill_converter(libdocs, tmp_path):
+    doc_converter = HtmlDocConverter()
+    write(
+        libdocs, tmp_path / 'rendered.xml', convert_docs=True, doc_converter=doc_converter, jobs=2
+    )
+    assert doc_converter.memo_size > 0
+    assert set(doc_converter.timings) == {'Painter', 'Colors', 'keywords'}
+
+
+# [user-010]
+def test_converter_keeps_most_recently_used_docs(libdocs):
+    libraries, _ = libdocs
+    painter, colors = libraries
+    doc_converter = HtmlDocConverter(max_size=2)
+    doc_converter.keyword_doc(painter, painter.keywords[0])
+    doc_converter.keyword_doc(colors, colors.keywords[0])
+    doc_converter.keyword_doc(painter, painter.keywords[0])
+    doc_converter.type_doc(colors, colors.data_types.enums[0])
+    assert doc_converter.memo_size == 2
+    # The doc of mix was used least recently.
+    assert len(doc_converter.get_library_docs(painter)) == 1
+    assert len(doc_converter.get_library_docs(colors)) == 1
+
+
+# [user-006]
+def test_empty_name_is_self_closing(project, dump):
+    xml = dump(project)
+    assert '<name></name>' not in xml
+    assert '<name>Paint</name>' in xml
+
+
+# [user-017]
+def test_forward_reference_resolves_to_later_library(project, dump):
+    xml = dump(project)
+    assert get_parameter_types(xml)[('Paint', 'color')] == get_elements(xml, 'datatype')['Color']
+
+
+# [user-017]
+def test_typed_dict_is_generic(project, dump):
+    xml = dump(project)
+    parameter_types = get_parameter_types(xml)
+    assert parameter_types[('Paint', 'options')] == -1
+    assert parameter_types[('Mix', 'options')] == get_elements(xml, 'datatype')['Options']
+
+
+# [user-023]
+def test_libraries_with_same_uid_raise_error(project, dump, tmp_path):
+    other = tmp_path / 'Key_Words.resource'
+    other.write_text('*** Keywords ***\nOther\n    No Operation\n', encoding='UTF-8')
+    with pytest.raises(ValueError, match="gets the same UID"):
+        dump([project[2], str(other)])
+
+
+# [user-009]
+def test_concurrent_writes_with_shared_converter(dump):
+    # Libraries with long docs, so the threads convert docs at the same time.
+    libraries = ['BuiltIn', 'Collections', 'String']
+    expected = dump(libraries)
+    doc_converter = HtmlDocConverter()
+    results = [None] * 8
+
+    def write_in_thread(index):
+        results[index] = dump(libraries, doc_converter=doc_converter)
+
+    threads = [threading.Thread(target=write_in_thread, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 8
+
+
+# [user-017]
+def test_type_index_prefers_own_library():
+    type_index = TypeIndex()
+    type_index.add('Options', None, 'Painter')
+    type_index.add('Options', 248, 'Colors')
+    type_index.add('Color', 245, 'Colors')
+    assert type_index.resolve(['Options'], 'Painter', -1) == -1
+    assert type_index.resolve(['Options'], 'Colors', -1) == 248
+    assert type_index.resolve(['Color'], 'Painter', -1) == 245
+    assert type_index.resolve(['Optional[Color]'], 'Painter', -1) == 245
+    assert type_index.resolve(['int | Color'], 'Painter', -1) == 245
+    assert type_index.resolve(['int'], 'Painter', -1) == -1
+
+
+# [user-017]
+def test_type_index_keeps_first_data_type():
+    type_index = TypeIndex()
+    type_index.add('Color', 245, 'Colors')
+    assert type_index.resolve(['Color']) == 245
+    type_index.add('Color', 300, 'Other')
+    assert type_index.resolve(['Color']) == 245
+    assert type_index.resolve(['Color'], 'Other') == 300